@@ -3,6 +3,52 @@
     Encryption Password
 """
 import bcrypt
+import math
+import os
+import time
+
+# Work factor of new hashes, set by BCRYPT_ROUNDS or calibrated on first
+# use to take about BCRYPT_TARGET_SECONDS on this machine
+ROUNDS = None
+
+
+def calibrate_rounds(target: float, probe_rounds: int = 6) -> int:
+    """Picks the bcrypt work factor whose hashes take about target seconds.
+
+    Each extra round doubles the work, so the work factor is extrapolated
+    from the fastest of a few hashes at a low work factor.
+
+    Args:
+        target (float): The wanted hash and verify latency, in seconds.
+        probe_rounds (int): The work factor of the probe hashes.
+
+    Returns:
+        int: The work factor, between 4 and 16.
+    """
+    salt = bcrypt.gensalt(probe_rounds)
+    elapsed = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.hashpw(b'calibration', salt)
+        elapsed.append(time.perf_counter() - start)
+    rounds = probe_rounds + math.floor(math.log2(target / min(elapsed)))
+    return max(4, min(16, rounds))
+
+
+def work_factor() -> int:
+    """Returns the work factor of new hashes, calibrating it if needed.
+
+    Returns:
+        int: The bcrypt work factor.
+    """
+    global ROUNDS
+    if ROUNDS is None:
+        try:
+            ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 0)) or calibrate_rounds(
+                float(os.getenv('BCRYPT_TARGET_SECONDS', 0.25)))
+        except ValueError:
+            ROUNDS = calibrate_rounds(0.25)
+    return ROUNDS
 
 
 def hash_password(password: str) -> bytes:
@@ -16,8 +62,28 @@ def hash_password(password: str) -> bytes:
     """
     # Check if the password is provided
     if password:
-        # Encode the password and generate a salted hash
-        return bcrypt.hashpw(str.encode(password), bcrypt.gensalt())
+        # Encode the password and generate a salted hash whose work
+        # factor is stored in it
+        return bcrypt.hashpw(str.encode(password),
+                             bcrypt.gensalt(work_factor()))
+
+
+def needs_rehash(hashed_password: bytes) -> bool:
+    """Checks if a hash has a lower work factor than new hashes.
+
+    Stronger hashes are kept, so that a calibration landing one round
+    lower never downgrades them.
+
+    Args:
+        hashed_password (bytes): The hashed password, e.g. $2b$12$...
+
+    Returns:
+        bool: True if the password should be hashed again once known.
+    """
+    parts = hashed_password.split(b'$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return True
+    return int(parts[2]) < work_factor()
 
 
 def is_valid(hashed_password: bytes, password: str) -> bool:
@@ -35,6 +35,9 @@ elif auth_type == 'session_exp_auth':
 elif auth_type == 'session_db_auth':
     from api.v1.auth.session_db_auth import SessionDBAuth
     auth = SessionDBAuth()
+elif auth_type == 'session_signed_auth':
+    from api.v1.auth.session_signed_auth import SessionSignedAuth
+    auth = SessionSignedAuth()
 
 
 # Error handler for 404 - Not Found
@@ -61,25 +64,28 @@ def forbidden(error) -> str:
     return jsonify({"error": "Forbidden"}), 403
 
 
+# Paths reachable without authentication, compiled once by require_auth
+EXCLUDED_PATHS = ('/api/v1/status/', '/api/v1/unauthorized/',
+                  '/api/v1/forbidden/', '/api/v1/auth_session/login/')
+
+
 # Before each request, perform authentication
 # and set current_user in the request object
 @app.before_request
 def before_request():
     """ Before request
     """
-    excluded_paths = ['/api/v1/status/', '/api/v1/unauthorized/',
-                      '/api/v1/forbidden/', '/api/v1/auth_session/login/']
-    if auth and auth.require_auth(request.path, excluded_paths):
+    if auth and auth.require_auth(request.path, EXCLUDED_PATHS):
         if (not auth.authorization_header(request) and
                 not auth.session_cookie(request)):
             # Abort with 401 Unauthorized if no authorization
             # header or session cookie is present
             abort(401)
-        if not auth.current_user(request):
-            # Abort with 403 Forbidden if the current user cannot be determined
-            abort(403)
         # Set the current_user in the request object for further use
         request.current_user = auth.current_user(request)
+        if not request.current_user:
+            # Abort with 403 Forbidden if the current user cannot be determined
+            abort(403)
 
 
 # Start the Flask application if this script is executed directly
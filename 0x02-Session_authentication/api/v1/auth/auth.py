@@ -7,21 +7,116 @@ Manage API authentication
 from flask import request
 from typing import List, TypeVar
 from os import getenv
+import functools
+import threading
+import time
+
+
+def memoize_per_request(current_user):
+    """ Make current_user resolve at most once per request and strategy,
+    timing each resolution
+    """
+    @functools.wraps(current_user)
+    def wrapper(self, request=None):
+        """ Return the user resolved for this request, resolving it once
+        """
+        # Cached in the WSGI environ, which lives as long as the request
+        cache = None
+        environ = getattr(request, 'environ', None)
+        if isinstance(environ, dict):
+            cache = environ.setdefault('auth.current_user', {})
+            if self in cache:
+                return cache[self]
+        start = time.perf_counter()
+        user = current_user(self, request)
+        Auth.record_timing(type(self).__name__, time.perf_counter() - start)
+        if cache is not None:
+            cache[self] = user
+        return user
+    return wrapper
+
+
+class PathMatcher:
+    """ Excluded paths compiled into a character trie
+
+    An entry containing '*' excludes every path starting with the text
+    before its first '*'. Any other entry excludes exactly that path, with
+    or without a trailing slash. Matching walks the path once.
+    """
+
+    EXACT = 0
+    PREFIX = 1
+
+    def __init__(self, excluded_paths: List[str]):
+        """ Build the trie of the excluded paths """
+        self.root = {}
+        for p in excluded_paths:
+            star = p.find('*')
+            if star >= 0:
+                key, mark = p[:star], PathMatcher.PREFIX
+            else:
+                key, mark = p.rstrip('/') + '/', PathMatcher.EXACT
+            node = self.root
+            for char in key:
+                node = node.setdefault(char, {})
+            node[mark] = True
+
+    def match(self, path: str) -> bool:
+        """ Check if path is excluded """
+        if path[-1] != '/':
+            path += '/'
+        node = self.root
+        for char in path:
+            if PathMatcher.PREFIX in node:
+                return True
+            node = node.get(char)
+            if node is None:
+                return False
+        return PathMatcher.PREFIX in node or PathMatcher.EXACT in node
+
+
+@functools.lru_cache(maxsize=64)
+def compile_excluded_paths(excluded_paths: tuple) -> PathMatcher:
+    """ Return the PathMatcher of a tuple of excluded paths """
+    return PathMatcher(excluded_paths)
 
 
 class Auth:
     """ Manage API authentication """
 
+    # Time spent resolving current_user: {strategy: {metric: value}}
+    timings = {}
+    timings_lock = threading.Lock()
+
+    def __init_subclass__(cls, **kwargs):
+        """ Memoize the current_user of each strategy per request """
+        super().__init_subclass__(**kwargs)
+        if 'current_user' in cls.__dict__:
+            cls.current_user = memoize_per_request(cls.current_user)
+
+    @classmethod
+    def record_timing(cls, strategy: str, seconds: float):
+        """ Account one current_user resolution of a strategy """
+        with Auth.timings_lock:
+            timing = Auth.timings.setdefault(
+                strategy, {'count': 0, 'seconds': 0.0, 'max': 0.0})
+            timing['count'] += 1
+            timing['seconds'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+
     def require_auth(self, path: str, excluded_paths: List[str]) -> bool:
         """ Check if the path is in the list of excluded paths """
         if not path or not excluded_paths:
             return True
-        if path[-1] != '/':
-            path += '/'
-        for p in excluded_paths:
-            if path[:p.find('*')] in p[:p.find('*')]:
-                return False
-        return True
+        last = getattr(self, '_excluded', None)
+        if last is not None and last[0] is excluded_paths:
+            # Same tuple as last time: nothing to hash or compile
+            matcher = last[1]
+        else:
+            matcher = compile_excluded_paths(tuple(excluded_paths))
+            if isinstance(excluded_paths, tuple):
+                self._excluded = (excluded_paths, matcher)
+        return not matcher.match(path)
 
     def authorization_header(self, request=None) -> str:
         """ Return the authorization header """
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+""" Cache of verified Basic authentication credentials
+"""
+from collections import OrderedDict
+from typing import TypeVar
+import hashlib
+import hmac
+import os
+import threading
+import time
+
+from models.user import User
+
+
+class CredentialCache():
+    """ Bounded LRU cache mapping an Authorization header to the user it
+    was verified for, for ttl seconds
+
+    Headers are only kept as an HMAC digest under a per-process key. An
+    entry is dropped as soon as its user is removed or its password hash
+    differs from the one it was verified against.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60):
+        """ Initialize an empty cache
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.key = os.urandom(32)
+        # {digest: (user id, password hash, expiry)}, oldest first
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def digest(self, authorization_header: str) -> bytes:
+        """ Return the keyed digest of a header
+        """
+        return hmac.new(self.key, authorization_header.encode('utf-8'),
+                        hashlib.sha256).digest()
+
+    def get(self, authorization_header: str) -> TypeVar('User'):
+        """ Return the user cached for a header, or None
+        """
+        digest = self.digest(authorization_header)
+        with self.lock:
+            entry = self.entries.get(digest)
+            if entry is not None and entry[2] < time.monotonic():
+                del self.entries[digest]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(digest)
+        user = User.get(entry[0])
+        if user is None or user.password != entry[1]:
+            with self.lock:
+                self.entries.pop(digest, None)
+                self.invalidations += 1
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return user
+
+    def put(self, authorization_header: str, user: TypeVar('User')):
+        """ Cache the user verified for a header
+        """
+        digest = self.digest(authorization_header)
+        expiry = time.monotonic() + self.ttl
+        with self.lock:
+            self.entries[digest] = (user.id, user.password, expiry)
+            self.entries.move_to_end(digest)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """ Drop every entry
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        """ Return the cache counters
+        """
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+            }
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+""" Local stand-in for the key-value server of the tcp session backend
+
+Serves the subset of the Redis protocol used by TCPSessionBackend: PING,
+SET (NX, XX, EX, PX), GET, GETDEL, DEL, KEYS, DBSIZE and FLUSHDB.
+
+Usage (from the project root):
+    python3 -m api.v1.auth.kv_server [port]
+"""
+from api.v1.auth.session_tcp import pack
+import fnmatch
+import socketserver
+import sys
+import threading
+import time
+
+
+class Store():
+    """ Keys with an optional expiry, shared by all connections
+    """
+
+    def __init__(self):
+        """ Initialize an empty Store
+        """
+        # {key: (value, expiry or None)}
+        self.data = {}
+        self.lock = threading.Lock()
+
+    def live(self, key: bytes, now: float):
+        """ Return the entry of a key, dropping it if expired; the lock
+        must be held
+        """
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, args: list) -> bytes:
+        """ Run one command, return its encoded reply
+        """
+        name = args[0].upper() if len(args) > 0 else b''
+        now = time.monotonic()
+        with self.lock:
+            if name == b'PING':
+                return b'+PONG\r\n'
+            if name == b'SET' and len(args) >= 3:
+                expiry, nx, xx = None, False, False
+                options = [a.upper() for a in args[3:]]
+                for i, option in enumerate(options):
+                    if option == b'NX':
+                        nx = True
+                    elif option == b'XX':
+                        xx = True
+                    elif option in (b'EX', b'PX') and i + 1 < len(options):
+                        scale = 1 if option == b'EX' else 1000
+                        expiry = now + int(options[i + 1]) / scale
+                live = self.live(args[1], now) is not None
+                if (nx and live) or (xx and not live):
+                    return b'$-1\r\n'
+                self.data[args[1]] = (args[2], expiry)
+                return b'+OK\r\n'
+            if name in (b'GET', b'GETDEL') and len(args) == 2:
+                entry = self.live(args[1], now)
+                if entry is None:
+                    return b'$-1\r\n'
+                if name == b'GETDEL':
+                    del self.data[args[1]]
+                return b'$%d\r\n%s\r\n' % (len(entry[0]), entry[0])
+            if name == b'DEL':
+                count = 0
+                for key in args[1:]:
+                    if self.live(key, now) is not None:
+                        del self.data[key]
+                        count += 1
+                return b':%d\r\n' % count
+            if name == b'KEYS' and len(args) == 2:
+                keys = [k for k in list(self.data)
+                        if self.live(k, now) is not None and
+                        fnmatch.fnmatchcase(k, args[1])]
+                return pack(*keys)
+            if name == b'DBSIZE':
+                return b':%d\r\n' % sum(
+                    1 for k in list(self.data)
+                    if self.live(k, now) is not None)
+            if name == b'FLUSHDB':
+                self.data.clear()
+                return b'+OK\r\n'
+        return b'-ERR unknown command\r\n'
+
+
+class Handler(socketserver.StreamRequestHandler):
+    """ Connection reading RESP commands until the client leaves
+    """
+
+    def handle(self):
+        """ Answer each command of the connection
+        """
+        while True:
+            line = self.rfile.readline()
+            if not line.startswith(b'*'):
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self.server.store.execute(args))
+
+
+class Server(socketserver.ThreadingTCPServer):
+    """ Threaded key-value server
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple):
+        """ Initialize the server and its Store
+        """
+        self.store = Store()
+        super().__init__(address, Handler)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 6379
+    with Server(('127.0.0.1', port)) as server:
+        server.serve_forever()
@@ -3,6 +3,7 @@
 
 # Import necessary modules and classes
 from api.v1.auth.auth import Auth
+from api.v1.auth.session_backend import session_backend
 from models.user import User
 import uuid
 
@@ -10,22 +11,23 @@ import uuid
 class SessionAuth(Auth):
     """ SessionAuth class to manage API authentication """
 
-    # Dictionary to store user_id mapped to session_id
-    user_id_by_session_id = {}
+    # Map of session_id to user_id, in the SESSION_BACKEND backend
+    user_id_by_session_id = session_backend()
 
     def create_session(self, user_id: str = None) -> str:
         """ Create a Session ID for a user_id """
         if isinstance(user_id, str):
-            # Generate a unique session ID using uuid
+            # Generate a unique session ID using uuid, and map it to the
+            # user_id unless another thread took it first
             session_id = str(uuid.uuid4())
-            # Map the session_id to the user_id in the dictionary
-            SessionAuth.user_id_by_session_id[session_id] = user_id
+            while not self.user_id_by_session_id.add(session_id, user_id):
+                session_id = str(uuid.uuid4())
             return session_id
 
     def user_id_for_session_id(self, session_id: str = None) -> str:
         """ Retrieve user_id for a given session_id """
         if isinstance(session_id, str):
-            return SessionAuth.user_id_by_session_id.get(session_id)
+            return self.user_id_by_session_id.get(session_id)
 
     def current_user(self, request=None):
         """ Return a User instance based on a cookie value """
@@ -40,6 +42,6 @@ class SessionAuth(Auth):
                 return False
             if not self.user_id_for_session_id(session_id):
                 return False
-            # Remove the session_id from the dictionary
-            self.user_id_by_session_id.pop(session_id)
-            return True
+            # Remove the session_id from the map; only one of concurrent
+            # logouts gets it back
+            return self.user_id_by_session_id.pop(session_id, None) is not None
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+""" Session backends: where SessionAuth keeps its sessions
+
+SESSION_BACKEND selects the backend:
+    memory (default)  in this process (ShardedSessionMap or SessionStore)
+    sqlite            SQLite WAL file shared by the processes of a host,
+                      at SESSION_SQLITE_PATH
+    tcp               key-value server speaking the Redis protocol, at
+                      SESSION_TCP_HOST:SESSION_TCP_PORT
+"""
+from datetime import datetime
+from os import getenv
+import json
+
+
+class SessionBackend():
+    """ Session backend interface: a mapping of session IDs to session
+    data, safe to use from several threads
+    """
+
+    def add(self, session_id: str, data) -> bool:
+        """ Store a new session, unless session_id is already live
+        """
+        raise NotImplementedError()
+
+    def __setitem__(self, session_id: str, data):
+        """ Store the data of a session
+        """
+        raise NotImplementedError()
+
+    def replace(self, session_id: str, data) -> bool:
+        """ Store the data of a session, only if it is still live
+        """
+        raise NotImplementedError()
+
+    def get(self, session_id: str, default=None):
+        """ Return the data of a live session, or default
+        """
+        raise NotImplementedError()
+
+    def pop(self, session_id: str, default=None):
+        """ Remove a session and return its data, or default
+        """
+        raise NotImplementedError()
+
+    def __len__(self) -> int:
+        """ Count the live sessions
+        """
+        raise NotImplementedError()
+
+    def clear(self):
+        """ Drop every session
+        """
+        raise NotImplementedError()
+
+    def __getitem__(self, session_id: str):
+        """ Return the data of a live session
+        """
+        data = self.get(session_id, KeyError)
+        if data is KeyError:
+            raise KeyError(session_id)
+        return data
+
+    def __contains__(self, session_id: str) -> bool:
+        """ Check if a session is live
+        """
+        return self.get(session_id, KeyError) is not KeyError
+
+
+def encode(data) -> str:
+    """ Serialize session data, datetimes included, for shared backends
+    """
+    def default(value):
+        if isinstance(value, datetime):
+            return {'$datetime': value.isoformat()}
+        raise TypeError(type(value).__name__)
+    return json.dumps(data, default=default, separators=(',', ':'))
+
+
+def decode(text: str):
+    """ Deserialize session data serialized by encode
+    """
+    def object_hook(value: dict):
+        if len(value) == 1 and '$datetime' in value:
+            return datetime.fromisoformat(value['$datetime'])
+        return value
+    return json.loads(text, object_hook=object_hook)
+
+
+def session_backend(duration: float = None,
+                    max_size: int = 100000) -> SessionBackend:
+    """ Return a new backend of type SESSION_BACKEND
+
+    Sessions expire after duration seconds, if above 0. In memory,
+    sessions without duration go to a ShardedSessionMap, others to a
+    SessionStore bounded to max_size, or unbounded if it is None.
+    """
+    backend_type = getenv('SESSION_BACKEND', 'memory')
+    if backend_type == 'sqlite':
+        from api.v1.auth.session_sqlite import SQLiteSessionBackend
+        return SQLiteSessionBackend(
+            getenv('SESSION_SQLITE_PATH', '.db_sessions.sqlite3'),
+            duration or 0)
+    if backend_type == 'tcp':
+        from api.v1.auth.session_tcp import TCPSessionBackend
+        try:
+            port = int(getenv('SESSION_TCP_PORT', 6379))
+        except ValueError:
+            port = 6379
+        return TCPSessionBackend(getenv('SESSION_TCP_HOST', '127.0.0.1'),
+                                 port, duration or 0)
+    if duration is None:
+        from api.v1.auth.session_map import ShardedSessionMap
+        try:
+            # Number of independently locked parts of the session map
+            shards = int(getenv('SESSION_SHARDS', 16))
+        except ValueError:
+            shards = 16
+        return ShardedSessionMap(shards)
+    from api.v1.auth.session_store import SessionStore
+    return SessionStore(duration, max_size)
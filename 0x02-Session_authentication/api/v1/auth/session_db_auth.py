@@ -6,11 +6,70 @@ from api.v1.auth.session_exp_auth import SessionExpAuth
 from models.user_session import UserSession
 from os import getenv
 from datetime import datetime, timedelta
+import atexit
+import threading
+import time
 
 
 class SessionDBAuth(SessionExpAuth):
     """SessionDBAuth class to manage API authentication"""
 
+    def __init__(self):
+        """Initialize SessionDBAuth
+        """
+        super().__init__()
+        # Sliding refreshes waiting to be saved: {session_id: UserSession}
+        # They are written together once SESSION_REFRESH_BATCH are
+        # pending, or by a timer SESSION_REFRESH_DELAY seconds after the
+        # first one
+        try:
+            self.refresh_batch = int(getenv('SESSION_REFRESH_BATCH', 100))
+            self.refresh_delay = float(getenv('SESSION_REFRESH_DELAY', 5))
+        except ValueError:
+            self.refresh_batch, self.refresh_delay = 100, 5
+        self.pending_refreshes = {}
+        self.pending_since = None
+        self.pending_lock = threading.Lock()
+        # Serializes refresh writes with logouts, so that a flush never
+        # saves back a session removed meanwhile
+        self.write_lock = threading.Lock()
+        atexit.register(self.flush_refreshes)
+
+    def refresh_session(self, user_session):
+        """Queue the refresh of a UserSession, saving the queue if due
+        """
+        # Seen at once by lookups in this process, written later
+        user_session.updated_at = datetime.utcnow()
+        with self.pending_lock:
+            self.pending_refreshes[user_session.session_id] = user_session
+            if self.pending_since is None:
+                self.pending_since = time.monotonic()
+                # Deadline of this batch, even if no lookup follows
+                timer = threading.Timer(self.refresh_delay,
+                                        self.flush_refreshes)
+                timer.daemon = True
+                timer.start()
+        self.flush_refreshes(force=False)
+
+    def flush_refreshes(self, force=True):
+        """Save the pending refreshes with a single write
+        """
+        with self.pending_lock:
+            if len(self.pending_refreshes) == 0:
+                return
+            due = (len(self.pending_refreshes) >= self.refresh_batch or
+                   time.monotonic() - self.pending_since >= self.refresh_delay)
+            if not (force or due):
+                return
+            sessions = list(self.pending_refreshes.values())
+            self.pending_refreshes = {}
+            self.pending_since = None
+        with self.write_lock:
+            # Logouts of other workers, too
+            UserSession.refresh()
+            UserSession.bulk_save([u for u in sessions
+                                   if UserSession.get(u.id) is not None])
+
     def create_session(self, user_id=None):
         """Create session
         """
@@ -21,7 +80,6 @@ class SessionDBAuth(SessionExpAuth):
             # Create a UserSession instance and save it to the file
             us = UserSession(user_id=user_id, session_id=session_id)
             us.save()
-            UserSession.save_to_file()
             return session_id
 
     def user_id_for_session_id(self, session_id=None):
@@ -31,21 +89,31 @@ class SessionDBAuth(SessionExpAuth):
         if not session_id:
             return None
 
-        # Load UserSession data from file
-        UserSession.load_from_file()
+        # Pick up sessions written by other processes, if any
+        UserSession.refresh()
 
         # Search for UserSession entries with the given session_id
         users = UserSession.search({'session_id': session_id})
 
         # Check if any users are found
         for u in users:
+            # Prefer a refresh not saved yet
+            u = self.pending_refreshes.get(session_id, u)
+
             # Calculate expiration time based on session_duration
             delta = timedelta(seconds=self.session_duration)
 
-            # Check if the session has expired
-            if u.created_at + delta < datetime.now():
+            # Check if the session has expired, counting from its last
+            # refresh when sliding
+            now = datetime.now()
+            start = u.updated_at if self.sliding else u.created_at
+            if start + delta < now:
                 return None
 
+            # Extend the session only once it is close enough to expiry
+            if self.sliding and start + delta - now < self.refresh_threshold:
+                self.refresh_session(u)
+
             # Return the user_id if the session is still valid
             return u.user_id
 
@@ -67,9 +135,15 @@ class SessionDBAuth(SessionExpAuth):
             # Search for UserSession entries with the given session_id
             users = UserSession.search({'session_id': session_id})
 
-            # Remove the UserSession entry, save to file, and return True
-            for u in users:
-                u.remove()
-                UserSession.save_to_file()
-                return True
+            # Drop any pending refresh, and wait for a flush in progress,
+            # so that it cannot bring the session back
+            with self.write_lock:
+                with self.pending_lock:
+                    self.pending_refreshes.pop(session_id, None)
+
+                # Remove the UserSession entry (saved to file) and return
+                # True
+                for u in users:
+                    u.remove()
+                    return True
         return False
@@ -3,6 +3,7 @@
 SessionExpAuth class to manage API authentication
 """
 from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_backend import session_backend
 from os import getenv
 from datetime import datetime, timedelta
 
@@ -19,6 +20,24 @@ class SessionExpAuth(SessionAuth):
         except Exception:
             # Set session duration to 0 if an exception occurs
             self.session_duration = 0
+        try:
+            # Live sessions kept before evicting the least recently used
+            max_size = int(getenv('SESSION_MAX_SIZE', 100000))
+        except ValueError:
+            max_size = 100000
+        # Sliding expiry: a session accessed with less than
+        # SESSION_REFRESH_THRESHOLD of its duration left is extended
+        self.sliding = getenv('SESSION_SLIDING', '').lower() in (
+            '1', 'true', 'on')
+        try:
+            ratio = float(getenv('SESSION_REFRESH_THRESHOLD', 0.5))
+        except ValueError:
+            ratio = 0.5
+        self.refresh_threshold = timedelta(
+            seconds=max(self.session_duration, 0) * ratio)
+        # Sessions of this instance, dropped once expired
+        self.user_id_by_session_id = session_backend(self.session_duration,
+                                                     max_size)
 
     def create_session(self, user_id=None):
         """Create session
@@ -28,7 +47,7 @@ class SessionExpAuth(SessionAuth):
         if session_id:
             # Store user_id and creation timestamp in
             # the user_id_by_session_id dictionary
-            SessionAuth.user_id_by_session_id[session_id] = {
+            self.user_id_by_session_id[session_id] = {
                 'user_id': user_id, 'created_at': datetime.now()}
             return session_id
 
@@ -40,7 +59,7 @@ class SessionExpAuth(SessionAuth):
             return None
 
         # Get the session dictionary from user_id_by_session_id
-        session_dict = SessionExpAuth.user_id_by_session_id.get(session_id)
+        session_dict = self.user_id_by_session_id.get(session_id)
 
         # Check if session_dict is available
         if not session_dict:
@@ -57,9 +76,21 @@ class SessionExpAuth(SessionAuth):
         # Calculate the expiration time based on session_duration
         delta = timedelta(seconds=self.session_duration)
 
-        # Check if the session has expired
-        if session_dict['created_at'] + delta < datetime.now():
+        # Check if the session has expired, counting from its last
+        # refresh when sliding
+        now = datetime.now()
+        start = session_dict['created_at']
+        if self.sliding:
+            start = session_dict.get('refreshed_at', start)
+        if start + delta < now:
             return None
 
+        # Extend the session only once it is close enough to expiry,
+        # so most requests do not write it back; never recreate it if it
+        # was destroyed meanwhile
+        if self.sliding and start + delta - now < self.refresh_threshold:
+            self.user_id_by_session_id.replace(
+                session_id, dict(session_dict, refreshed_at=now))
+
         # Return the user_id if the session is still valid
         return session_dict['user_id']
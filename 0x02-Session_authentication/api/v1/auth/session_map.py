@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+""" Concurrent session map sharded by session ID
+"""
+from api.v1.auth.session_backend import SessionBackend
+import threading
+
+
+class ShardedSessionMap(SessionBackend):
+    """ Mapping of session IDs to session data split in shards, each
+    guarded by its own lock
+
+    A session ID always hashes to the same shard, so operations on
+    different sessions rarely wait on each other, and every operation on
+    one session is atomic.
+    """
+
+    def __init__(self, shards: int = 16):
+        """ Initialize an empty map of shards dicts
+        """
+        self.shards = [{} for _ in range(max(shards, 1))]
+        self.locks = [threading.Lock() for _ in self.shards]
+
+    def shard(self, session_id: str) -> int:
+        """ Return the shard number of a session ID
+        """
+        return hash(session_id) % len(self.shards)
+
+    def add(self, session_id: str, data) -> bool:
+        """ Store a new session, unless session_id is already taken
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            if session_id in self.shards[i]:
+                return False
+            self.shards[i][session_id] = data
+            return True
+
+    def __setitem__(self, session_id: str, data):
+        """ Store the data of a session
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            self.shards[i][session_id] = data
+
+    def replace(self, session_id: str, data) -> bool:
+        """ Store the data of a session, only if it still exists
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            if session_id not in self.shards[i]:
+                return False
+            self.shards[i][session_id] = data
+            return True
+
+    def get(self, session_id: str, default=None):
+        """ Return the data of a session, or default
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            return self.shards[i].get(session_id, default)
+
+    def pop(self, session_id: str, default=None):
+        """ Remove a session and return its data, or default
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            return self.shards[i].pop(session_id, default)
+
+    def __getitem__(self, session_id: str):
+        """ Return the data of a session
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            return self.shards[i][session_id]
+
+    def __contains__(self, session_id: str) -> bool:
+        """ Check if a session exists
+        """
+        i = self.shard(session_id)
+        with self.locks[i]:
+            return session_id in self.shards[i]
+
+    def __len__(self) -> int:
+        """ Count the sessions
+        """
+        return sum(len(shard) for shard in self.shards)
+
+    def clear(self):
+        """ Drop every session
+        """
+        for lock, shard in zip(self.locks, self.shards):
+            with lock:
+                shard.clear()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+SessionSignedAuth class to manage API authentication
+"""
+from api.v1.auth.session_auth import SessionAuth
+from api.v1.auth.session_backend import session_backend
+from os import getenv
+import base64
+import binascii
+import hmac
+import os
+import time
+
+
+def b64encode(data: bytes) -> str:
+    """ Encode bytes as unpadded URL-safe base64 """
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def b64decode(data: str) -> bytes:
+    """ Decode unpadded URL-safe base64 """
+    return base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+
+
+class SessionSignedAuth(SessionAuth):
+    """SessionSignedAuth class: sessions are stateless signed tokens
+
+    A token reads <key id>.<payload>.<signature>: the payload holds the
+    user_id, the expiry time and a random token id, the signature is
+    their HMAC-SHA256 under the key. Tokens are checked without any
+    session storage, so every worker holding the keys accepts them.
+
+    SESSION_SIGNING_KEYS lists the keys as "id:secret,id:secret": new
+    tokens are signed with the first one, the others are still accepted,
+    so keys are rotated by putting a new one first and dropping the last
+    one once its tokens have expired. Without it, a random key is drawn
+    per process. With SESSION_REVOCATION set to 1, logged out tokens go
+    to a revocation set kept in the SESSION_BACKEND backend until they
+    expire. The set is never capped, since evicting a revocation would
+    bring its token back to life, so it is only kept when SESSION_DURATION
+    is positive; otherwise logging out just drops the cookie.
+    """
+
+    def __init__(self):
+        """Initialize SessionSignedAuth
+        """
+        try:
+            # Lifetime of the tokens in seconds, 0 for no expiry
+            self.session_duration = int(getenv('SESSION_DURATION'))
+        except Exception:
+            self.session_duration = 0
+        self.keys = {}
+        for item in getenv('SESSION_SIGNING_KEYS', '').split(','):
+            key_id, sep, secret = item.strip().partition(':')
+            if sep and key_id and secret and '.' not in key_id:
+                self.keys.setdefault(key_id, secret.encode('utf-8'))
+                if len(self.keys) == 1:
+                    self.signing_key_id = key_id
+        if len(self.keys) == 0:
+            self.signing_key_id = b64encode(os.urandom(6))
+            self.keys[self.signing_key_id] = os.urandom(32)
+        # Token ids logged out before their expiry
+        self.revoked = None
+        # Revocations of tokens without expiry would pile up forever
+        if (getenv('SESSION_REVOCATION', '0') == '1' and
+                self.session_duration > 0):
+            self.revoked = session_backend(self.session_duration,
+                                           max_size=None)
+
+    def sign(self, key_id: str, payload: str) -> str:
+        """ Return the signature of a payload under a key """
+        message = '{}.{}'.format(key_id, payload).encode('ascii')
+        # One-shot digest, computed in C
+        return b64encode(hmac.digest(self.keys[key_id], message, 'sha256'))
+
+    def create_session(self, user_id: str = None) -> str:
+        """ Create a signed token for a user_id """
+        if not isinstance(user_id, str):
+            return None
+        expiry = 0
+        if self.session_duration > 0:
+            expiry = int(time.time()) + self.session_duration
+        token_id = b64encode(os.urandom(12))
+        payload = b64encode('{}:{}:{}'.format(
+            token_id, expiry, user_id).encode('utf-8'))
+        return '{}.{}.{}'.format(self.signing_key_id, payload,
+                                 self.sign(self.signing_key_id, payload))
+
+    def verify(self, session_id: str) -> tuple:
+        """ Return (token id, user_id) of a valid token, or None """
+        if not isinstance(session_id, str) or not session_id.isascii():
+            return None
+        parts = session_id.split('.')
+        if len(parts) != 3 or parts[0] not in self.keys:
+            return None
+        key_id, payload, signature = parts
+        if not hmac.compare_digest(self.sign(key_id, payload), signature):
+            return None
+        try:
+            token_id, expiry, user_id = b64decode(
+                payload).decode('utf-8').split(':', 2)
+            expiry = int(expiry)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if expiry != 0 and expiry <= time.time():
+            return None
+        if self.revoked is not None and token_id in self.revoked:
+            return None
+        return token_id, user_id
+
+    def user_id_for_session_id(self, session_id: str = None) -> str:
+        """ Retrieve user_id from a valid token """
+        token = self.verify(session_id)
+        if token is not None:
+            return token[1]
+
+    def destroy_session(self, request=None) -> bool:
+        """ Revoke the token of the request / log out """
+        if request:
+            token = self.verify(self.session_cookie(request))
+            if token is None:
+                return False
+            if self.revoked is None:
+                # Nothing to revoke: the client drops its cookie
+                return True
+            return self.revoked.add(token[0], True)
+        return False
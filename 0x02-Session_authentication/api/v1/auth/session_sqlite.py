@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+""" Session backend shared by the processes of a host through SQLite
+"""
+from api.v1.auth.session_backend import SessionBackend, encode, decode
+import sqlite3
+import threading
+import time
+
+
+# Expired rows are deleted once every PURGE_EVERY sessions added
+PURGE_EVERY = 1000
+
+
+class SQLiteSessionBackend(SessionBackend):
+    """ Sessions in one table of an SQLite database in WAL mode
+
+    Readers never block the writer nor each other, so every worker
+    process of a host sees the sessions of the others. Expiry times are
+    wall clock times, comparable across processes.
+    """
+
+    def __init__(self, db_path: str, duration: float = 0):
+        """ Initialize the backend on db_path
+        """
+        self.db_path = db_path
+        self.duration = duration
+        # sqlite3 connections are used by the thread that opened them
+        self.local = threading.local()
+        self.adds = 0
+
+    def connection(self) -> sqlite3.Connection:
+        """ Return the connection of the current thread, creating the
+        table on first use
+        """
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, isolation_level=None,
+                                   timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute('CREATE TABLE IF NOT EXISTS sessions ('
+                         'session_id TEXT PRIMARY KEY, data TEXT NOT NULL, '
+                         'expires REAL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS sessions_expires '
+                         'ON sessions (expires)')
+            self.local.conn = conn
+        return conn
+
+    def expiry(self, now: float) -> float:
+        """ Return the expiry time of a session stored at now
+        """
+        return now + self.duration if self.duration > 0 else None
+
+    def add(self, session_id: str, data) -> bool:
+        """ Store a new session, unless session_id is already live
+        """
+        now = time.time()
+        self.adds += 1
+        if self.adds % PURGE_EVERY == 0:
+            self.purge(now)
+        # An expired session with the same ID is taken over
+        cursor = self.connection().execute(
+            'INSERT INTO sessions VALUES (?, ?, ?) '
+            'ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, '
+            'expires = excluded.expires WHERE sessions.expires <= ?',
+            (session_id, encode(data), self.expiry(now), now))
+        return cursor.rowcount == 1
+
+    def __setitem__(self, session_id: str, data):
+        """ Store the data of a session
+        """
+        self.connection().execute(
+            'INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)',
+            (session_id, encode(data), self.expiry(time.time())))
+
+    def replace(self, session_id: str, data) -> bool:
+        """ Store the data of a session, only if it is still live
+        """
+        now = time.time()
+        cursor = self.connection().execute(
+            'UPDATE sessions SET data = ?, expires = ? WHERE session_id = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (encode(data), self.expiry(now), session_id, now))
+        return cursor.rowcount == 1
+
+    def get(self, session_id: str, default=None):
+        """ Return the data of a live session, or default
+        """
+        row = self.connection().execute(
+            'SELECT data FROM sessions WHERE session_id = ? '
+            'AND (expires IS NULL OR expires > ?)',
+            (session_id, time.time())).fetchone()
+        return default if row is None else decode(row[0])
+
+    def pop(self, session_id: str, default=None):
+        """ Remove a session and return its data, or default
+        """
+        rows = self.connection().execute(
+            'DELETE FROM sessions WHERE session_id = ? '
+            'RETURNING data, expires', (session_id,)).fetchall()
+        if len(rows) == 0 or (rows[0][1] is not None and
+                              rows[0][1] <= time.time()):
+            return default
+        return decode(rows[0][0])
+
+    def __len__(self) -> int:
+        """ Count the live sessions
+        """
+        row = self.connection().execute(
+            'SELECT COUNT(*) FROM sessions '
+            'WHERE expires IS NULL OR expires > ?', (time.time(),)).fetchone()
+        return row[0]
+
+    def clear(self):
+        """ Drop every session
+        """
+        self.connection().execute('DELETE FROM sessions')
+
+    def purge(self, now: float = None):
+        """ Delete the expired sessions
+        """
+        if now is None:
+            now = time.time()
+        self.connection().execute(
+            'DELETE FROM sessions WHERE expires <= ?', (now,))
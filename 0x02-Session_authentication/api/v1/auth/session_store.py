@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+""" Bounded session store evicting expired sessions
+"""
+from api.v1.auth.session_backend import SessionBackend
+from collections import OrderedDict, deque
+import threading
+import time
+
+
+class SessionStore(SessionBackend):
+    """ Mapping of session IDs to session data, bounded in time and size
+
+    Every session lives for the same duration, so expiry times are queued
+    in creation order and expired sessions are dropped from the front of
+    the queue in amortized O(1) at each access. Once max_size sessions are
+    live, the least recently used one is evicted; a max_size of None never
+    evicts. A duration <= 0 means sessions never expire.
+    """
+
+    def __init__(self, duration: float = 0, max_size: int = 100000):
+        """ Initialize an empty store
+        """
+        self.duration = duration
+        self.max_size = max_size
+        # {session ID: (data, expiry)}, least recently used first
+        self.entries = OrderedDict()
+        # (expiry, session ID) in expiry order; may hold stale pairs of
+        # sessions replaced, removed or evicted since
+        self.expiries = deque()
+        self.lock = threading.Lock()
+        self.expired = 0
+        self.evicted = 0
+
+    def expire(self, now: float = None):
+        """ Drop the sessions expired at now
+        """
+        if self.duration <= 0:
+            return
+        if now is None:
+            now = time.monotonic()
+        with self.lock:
+            expiries = self.expiries
+            while len(expiries) > 0 and expiries[0][0] <= now:
+                expiry, session_id = expiries.popleft()
+                entry = self.entries.get(session_id)
+                if entry is not None and entry[1] == expiry:
+                    del self.entries[session_id]
+                    self.expired += 1
+
+    def insert(self, session_id: str, data, now: float):
+        """ Store a session; the lock must be held
+        """
+        expiry = None
+        if self.duration > 0:
+            expiry = now + self.duration
+        self.entries[session_id] = (data, expiry)
+        self.entries.move_to_end(session_id)
+        if expiry is not None:
+            self.expiries.append((expiry, session_id))
+        while (self.max_size is not None
+               and len(self.entries) > self.max_size):
+            self.entries.popitem(last=False)
+            self.evicted += 1
+        if len(self.expiries) > 2 * len(self.entries) + 64:
+            # Too many stale pairs: keep the live ones, in order
+            self.expiries = deque(
+                pair for pair in self.expiries
+                if self.entries.get(pair[1], (None, None))[1] == pair[0])
+
+    def __setitem__(self, session_id: str, data):
+        """ Store the data of a new or renewed session
+        """
+        now = time.monotonic()
+        self.expire(now)
+        with self.lock:
+            self.insert(session_id, data, now)
+
+    def add(self, session_id: str, data) -> bool:
+        """ Store a new session, unless session_id is already live
+        """
+        now = time.monotonic()
+        self.expire(now)
+        with self.lock:
+            if session_id in self.entries:
+                return False
+            self.insert(session_id, data, now)
+            return True
+
+    def replace(self, session_id: str, data) -> bool:
+        """ Store the data of a session, only if it is still live
+        """
+        now = time.monotonic()
+        self.expire(now)
+        with self.lock:
+            if session_id not in self.entries:
+                return False
+            self.insert(session_id, data, now)
+            return True
+
+    def get(self, session_id: str, default=None):
+        """ Return the data of a live session, or default
+        """
+        self.expire()
+        with self.lock:
+            entry = self.entries.get(session_id)
+            if entry is None:
+                return default
+            self.entries.move_to_end(session_id)
+            return entry[0]
+
+    def pop(self, session_id: str, default=None):
+        """ Remove a session and return its data, or default
+        """
+        self.expire()
+        with self.lock:
+            entry = self.entries.pop(session_id, None)
+        return default if entry is None else entry[0]
+
+    def __len__(self) -> int:
+        """ Count the live sessions
+        """
+        self.expire()
+        return len(self.entries)
+
+    def clear(self):
+        """ Drop every session
+        """
+        with self.lock:
+            self.entries.clear()
+            self.expiries.clear()
+
+    def stats(self) -> dict:
+        """ Return the live and expired gauges of the store
+        """
+        self.expire()
+        with self.lock:
+            return {
+                'live': len(self.entries),
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'max_size': self.max_size,
+            }
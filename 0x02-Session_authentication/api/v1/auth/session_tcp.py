@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+""" Session backend on a key-value server speaking the Redis protocol
+
+Redis 6.2+ or the stand-in of api.v1.auth.kv_server can serve it.
+"""
+from api.v1.auth.session_backend import SessionBackend, encode, decode
+import socket
+import threading
+
+
+class ServerError(Exception):
+    """ Error reply of the key-value server
+    """
+    pass
+
+
+def pack(*args) -> bytes:
+    """ Encode a command as a RESP array of bulk strings
+    """
+    parts = [b'*%d\r\n' % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode('utf-8')
+        parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+    return b''.join(parts)
+
+
+def read_reply(f):
+    """ Read one RESP reply from a binary file
+    """
+    line = f.readline()
+    if not line.endswith(b'\r\n'):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b'+':
+        return rest.decode('utf-8')
+    if kind == b'-':
+        raise ServerError(rest.decode('utf-8'))
+    if kind == b':':
+        return int(rest)
+    if kind == b'$':
+        length = int(rest)
+        if length < 0:
+            return None
+        return f.read(length + 2)[:-2]
+    if kind == b'*':
+        length = int(rest)
+        if length < 0:
+            return None
+        return [read_reply(f) for _ in range(length)]
+    raise ServerError("unexpected reply {!r}".format(line))
+
+
+class TCPSessionBackend(SessionBackend):
+    """ Sessions as session:<id> keys of a key-value server, expiring
+    on the server
+    """
+
+    PREFIX = 'session:'
+
+    def __init__(self, host: str, port: int, duration: float = 0,
+                 timeout: float = 1.0):
+        """ Initialize the backend; connections are opened on first use
+        """
+        self.host = host
+        self.port = port
+        self.duration = duration
+        self.timeout = timeout
+        # One connection per thread, so commands never interleave
+        self.local = threading.local()
+
+    def connection(self):
+        """ Return the (socket, reader) pair of the current thread
+        """
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port),
+                                            self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn = self.local.conn = (sock, sock.makefile('rb'))
+        return conn
+
+    def close(self):
+        """ Close the connection of the current thread
+        """
+        conn = getattr(self.local, 'conn', None)
+        self.local.conn = None
+        if conn is not None:
+            conn[1].close()
+            conn[0].close()
+
+    def command(self, *args):
+        """ Send a command and return its reply, reconnecting once if the
+        connection was lost
+        """
+        for attempt in (1, 2):
+            sock, f = self.connection()
+            try:
+                sock.sendall(pack(*args))
+                return read_reply(f)
+            except (ConnectionError, socket.timeout):
+                self.close()
+                if attempt == 2:
+                    raise
+
+    def set(self, session_id: str, data, *options) -> bool:
+        """ SET the key of a session with its expiry
+        """
+        args = ['SET', self.PREFIX + session_id, encode(data)]
+        if self.duration > 0:
+            args.extend(['PX', max(int(self.duration * 1000), 1)])
+        return self.command(*(args + list(options))) is not None
+
+    def add(self, session_id: str, data) -> bool:
+        """ Store a new session, unless session_id is already live
+        """
+        return self.set(session_id, data, 'NX')
+
+    def __setitem__(self, session_id: str, data):
+        """ Store the data of a session
+        """
+        self.set(session_id, data)
+
+    def replace(self, session_id: str, data) -> bool:
+        """ Store the data of a session, only if it is still live
+        """
+        return self.set(session_id, data, 'XX')
+
+    def get(self, session_id: str, default=None):
+        """ Return the data of a live session, or default
+        """
+        value = self.command('GET', self.PREFIX + session_id)
+        return default if value is None else decode(value)
+
+    def pop(self, session_id: str, default=None):
+        """ Remove a session and return its data, or default
+        """
+        value = self.command('GETDEL', self.PREFIX + session_id)
+        return default if value is None else decode(value)
+
+    def keys(self) -> list:
+        """ Return the keys of the live sessions (walks every key)
+        """
+        return self.command('KEYS', self.PREFIX + '*')
+
+    def __len__(self) -> int:
+        """ Count the live sessions
+        """
+        return len(self.keys())
+
+    def clear(self):
+        """ Drop every session
+        """
+        keys = self.keys()
+        if len(keys) > 0:
+            self.command('DEL', *keys)
@@ -26,6 +26,16 @@ def stats() -> str:
     return jsonify(stats)
 
 
+@app_views.route('/metrics/admission', strict_slashes=False)
+def admission_metrics() -> str:
+    """ GET /api/v1/metrics/admission
+    Return:
+      - the admission control metrics of the login route
+    """
+    from api.v1.admission import LOGIN_ADMISSION
+    return jsonify({'login': LOGIN_ADMISSION.stats()})
+
+
 @app_views.route('/unauthorized', methods=['GET'], strict_slashes=False)
 def unauthorized() -> str:
     """Handles unauthorized access.
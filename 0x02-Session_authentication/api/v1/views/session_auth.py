@@ -2,6 +2,7 @@
 """ Module of session auth views """
 
 # Import necessary modules and classes
+from api.v1.admission import LOGIN_ADMISSION
 from api.v1.views import app_views
 from flask import abort, jsonify, request
 from models.user import User
@@ -10,6 +11,7 @@ from os import getenv
 
 # Route for user login
 @app_views.route('/auth_session/login', methods=['POST'], strict_slashes=False)
+@LOGIN_ADMISSION.limit
 def login():
     """ POST /auth_session/login
     Return:
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+""" Microbenchmarks of the Basic Authorization header parsing
+
+Compares the three-step extract/decode/extract chain with the fused
+BasicAuth.parse_authorization_header on valid, malformed and oversized
+headers.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_basic_auth [number_of_iterations]
+"""
+import base64
+import sys
+import timeit
+
+from api.v1.auth.basic_auth import BasicAuth
+
+
+def token(credentials: str) -> str:
+    """ Return the base64 token of credentials
+    """
+    return base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+
+
+HEADERS = {
+    'valid': "Basic " + token("bob@hbtn.io:H0lbertonSchool98!"),
+    'no scheme': "Bearer " + token("bob@hbtn.io:H0lbertonSchool98!"),
+    'bad base64': "Basic bob@hbtn.io:H0lbertonSchool98!",
+    'no colon': "Basic " + token("bob@hbtn.io"),
+    'oversized': "Basic " + token("bob@hbtn.io:" + "x" * 1000000),
+}
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    auth = BasicAuth()
+
+    def chain(header):
+        """ Parsing as done before the fused parser
+        """
+        b64 = auth.extract_base64_authorization_header(header)
+        decoded = auth.decode_base64_authorization_header(b64)
+        return auth.extract_user_credentials(decoded)
+
+    print("{:<12} {:>12} {:>12} {:>8}".format(
+        'header', 'chain ns/op', 'fused ns/op', 'speedup'))
+    for name, header in HEADERS.items():
+        n = number if name != 'oversized' else max(number // 1000, 10)
+        slow = timeit.timeit(lambda: chain(header), number=n) / n
+        fast = timeit.timeit(
+            lambda: auth.parse_authorization_header(header), number=n) / n
+        print("{:<12} {:>12.0f} {:>12.0f} {:>7.1f}x".format(
+            name, slow * 1e9, fast * 1e9, slow / fast))
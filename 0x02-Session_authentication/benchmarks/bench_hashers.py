@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+""" Verify latency and throughput of the password hashers per cost
+
+Use it to pick PASSWORD_HASHER and its cost (PBKDF2_ITERATIONS, SCRYPT_N,
+BCRYPT_ROUNDS) for the login latency a deployment can afford; users are
+migrated to the chosen one as they log in.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_hashers [verifies_per_cost]
+"""
+import sys
+import time
+
+from models.hashers import (HASHERS, SHA256Hasher, PBKDF2Hasher,
+                            ScryptHasher, BcryptHasher)
+
+
+def candidates() -> list:
+    """ Return (label, hasher) pairs of every registered algorithm at a
+    few costs
+    """
+    pairs = [('sha256 (default)', SHA256Hasher())]
+    for iterations in (100000, 260000, 600000):
+        pairs.append(('pbkdf2_sha256 {}'.format(iterations),
+                      PBKDF2Hasher(iterations)))
+    if ScryptHasher.algorithm in HASHERS:
+        for n in (1 << 13, 1 << 14, 1 << 15):
+            pairs.append(('scrypt n={}'.format(n), ScryptHasher(n)))
+    if BcryptHasher.algorithm in HASHERS:
+        for rounds in (10, 11, 12):
+            pairs.append(('bcrypt {}'.format(rounds), BcryptHasher(rounds)))
+    return pairs
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print("{:<22} {:>10} {:>10} {:>12}".format(
+        'hasher', 'p50 ms', 'max ms', 'verifies/s'))
+    for label, hasher in candidates():
+        encoded = hasher.encode('H0lbertonSchool98!')
+        n = number if not isinstance(hasher, SHA256Hasher) else 10000
+        samples = []
+        for _ in range(n):
+            start = time.perf_counter()
+            assert hasher.verify('H0lbertonSchool98!', encoded)
+            samples.append(time.perf_counter() - start)
+        samples.sort()
+        print("{:<22} {:>10.3f} {:>10.3f} {:>12.1f}".format(
+            label, samples[len(samples) // 2] * 1e3, samples[-1] * 1e3,
+            len(samples) / sum(samples)))
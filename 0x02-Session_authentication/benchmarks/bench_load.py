@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+""" Benchmark of User.load_from_file on a generated .db_User.json
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_load [number_of_users]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from models.engine.file_storage import DATA
+from models.user import User
+
+
+def generate(file_path: str, n: int):
+    """ Write a .db_User.json file holding n users
+    """
+    with open(file_path, 'w') as f:
+        f.write('{')
+        for i in range(n):
+            user_id = "{:08d}-0000-0000-0000-000000000000".format(i)
+            obj = {
+                'id': user_id,
+                'created_at': "2024-01-01T00:00:00",
+                'updated_at': "2024-01-01T00:00:00",
+                'email': "user{}@example.com".format(i),
+                '_password': "0" * 64,
+                'first_name': "First{}".format(i),
+                'last_name': "Last{}".format(i),
+            }
+            f.write('{}{}: {}'.format(', ' if i else '',
+                                      json.dumps(user_id), json.dumps(obj)))
+        f.write('}')
+
+
+def load_all_at_once(file_path: str):
+    """ Previous loader: json.load of the whole file, then instantiate
+    """
+    DATA['User'] = {}
+    with open(file_path, 'r') as f:
+        objs_json = json.load(f)
+        for obj_id, obj_json in objs_json.items():
+            DATA['User'][obj_id] = User(**obj_json)
+
+
+def measure(name: str, load, n: int):
+    """ Run load once and print its time and traced peak memory
+    """
+    DATA['User'] = {}
+    tracemalloc.start()
+    start = time.perf_counter()
+    load()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print("{:<12} {:>8.3f} s {:>12.0f} obj/s {:>10.1f} MB peak".format(
+        name, elapsed, n / elapsed, peak / 2 ** 20))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    os.chdir(tempfile.mkdtemp())
+    file_path = ".db_User.json"
+    generate(file_path, n)
+    print("{} users, {:.1f} MB file".format(
+        n, os.path.getsize(file_path) / 2 ** 20))
+    measure("json.load", lambda: load_all_at_once(file_path), n)
+    measure("streaming", User.load_from_file, n)
+    print("load stats:", User.stats().get('load'))
+    os.remove(file_path)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+""" Benchmark of the memory held per User instance
+
+Compares the slotted User with an equivalent __dict__-backed class.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_memory [number_of_users]
+"""
+from datetime import datetime
+import sys
+import tracemalloc
+
+from models.user import User
+
+
+class DictUser():
+    """ User layout before __slots__: every attribute in a __dict__
+    """
+
+    def __init__(self, **kwargs: dict):
+        """ Initialize the same attributes as User
+        """
+        self.id = kwargs.get('id')
+        self.created_at = datetime.utcnow()
+        self.updated_at = datetime.utcnow()
+        self.email = kwargs.get('email')
+        self._password = kwargs.get('_password')
+        self.first_name = kwargs.get('first_name')
+        self.last_name = kwargs.get('last_name')
+
+
+def bytes_per_user(cls: type, kwargs_list: list) -> float:
+    """ Return the traced bytes allocated per instance of cls
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objs = [cls(**kwargs) for kwargs in kwargs_list]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return (after - before) / len(kwargs_list)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    # Attribute values are shared by both runs so only layout is measured
+    kwargs_list = [{
+        'id': "{:08d}-0000-0000-0000-000000000000".format(i),
+        'email': "user{}@example.com".format(i),
+        '_password': "0" * 64,
+        'first_name': "First{}".format(i),
+        'last_name': "Last{}".format(i),
+    } for i in range(n)]
+    before = bytes_per_user(DictUser, kwargs_list)
+    after = bytes_per_user(User, kwargs_list)
+    print("{} users".format(n))
+    print("__dict__  {:>8.1f} bytes/user".format(before))
+    print("__slots__ {:>8.1f} bytes/user".format(after))
+    print("saved     {:>8.1f} bytes/user ({:.0%})".format(
+        before - after, (before - after) / before))
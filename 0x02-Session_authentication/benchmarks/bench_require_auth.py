@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+""" Microbenchmarks of Auth.require_auth with many excluded paths
+
+Compares the loop over excluded paths used before with the compiled
+PathMatcher, for hits on the first and last rule and for misses.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_require_auth [number_of_rules]
+"""
+import sys
+import timeit
+
+from api.v1.auth.auth import Auth
+
+
+def legacy(path: str, excluded_paths: list) -> bool:
+    """ require_auth as done before the compiled matcher
+    """
+    if not path or not excluded_paths:
+        return True
+    if path[-1] != '/':
+        path += '/'
+    for p in excluded_paths:
+        if path[:p.find('*')] in p[:p.find('*')]:
+            return False
+    return True
+
+
+def rules(n: int) -> tuple:
+    """ Return n excluded paths, half exact and half wildcards
+    """
+    paths = []
+    for i in range(n):
+        if i % 2 == 0:
+            paths.append('/api/v1/resource_{}/'.format(i))
+        else:
+            paths.append('/api/v1/public_{}*'.format(i))
+    return tuple(paths)
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    excluded_paths = rules(n)
+    number = 20000
+    auth = Auth()
+    paths = {
+        'first rule': '/api/v1/resource_0',
+        'last rule': '/api/v1/public_{}/files'.format(n - 1 - (n % 2 == 0)),
+        'miss': '/api/v1/users/me',
+    }
+
+    print("{} excluded paths".format(n))
+    print("{:<12} {:>12} {:>12} {:>8}".format(
+        'path', 'loop ns/op', 'trie ns/op', 'speedup'))
+    for name, path in paths.items():
+        assert legacy(path, excluded_paths) == \
+            auth.require_auth(path, excluded_paths)
+        slow = timeit.timeit(lambda: legacy(path, excluded_paths),
+                             number=number) / number
+        fast = timeit.timeit(lambda: auth.require_auth(path, excluded_paths),
+                             number=number) / number
+        print("{:<12} {:>12.0f} {:>12.0f} {:>7.1f}x".format(
+            name, slow * 1e9, fast * 1e9, slow / fast))
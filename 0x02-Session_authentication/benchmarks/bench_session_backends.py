@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+""" Lookup latency of the session backends, and cross-process visibility
+
+For each backend, a child process creates sessions that the parent then
+reads; the latency of lookups and of create/destroy cycles is reported
+in microseconds. The tcp backend is served by a local stand-in
+(api.v1.auth.kv_server) started on a free port.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_session_backends [number_of_lookups]
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from api.v1.auth.kv_server import Server
+from api.v1.auth.session_map import ShardedSessionMap
+from api.v1.auth.session_sqlite import SQLiteSessionBackend
+from api.v1.auth.session_tcp import TCPSessionBackend
+
+
+def create_sessions(factory, n: int):
+    """ Create n sessions from a fresh backend (run in a child process)
+    """
+    backend = factory()
+    for i in range(n):
+        backend.add('child_{}'.format(i), 'user_{}'.format(i))
+
+
+def percentiles(samples: list) -> tuple:
+    """ Return the median and 99th percentile of samples, in us
+    """
+    samples = sorted(samples)
+    return (samples[len(samples) // 2] * 1e6,
+            samples[int(len(samples) * 0.99)] * 1e6)
+
+
+if __name__ == "__main__":
+    number = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    tmp_dir = tempfile.mkdtemp()
+    server = Server(('127.0.0.1', 0))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+    db_path = os.path.join(tmp_dir, 'sessions.sqlite3')
+    factories = {
+        'memory': ShardedSessionMap,
+        'sqlite': lambda: SQLiteSessionBackend(db_path, 3600),
+        'tcp': lambda: TCPSessionBackend('127.0.0.1', port, 3600),
+    }
+    children = 100
+    ctx = multiprocessing.get_context('fork')
+
+    print("{:<8} {:>10} {:>10} {:>10} {:>10}  {}".format(
+        'backend', 'get p50', 'get p99', 'cycle p50', 'cycle p99',
+        'sessions of a child'))
+    for name, factory in factories.items():
+        child = ctx.Process(target=create_sessions,
+                            args=(factory, children))
+        child.start()
+        child.join()
+        backend = factory()
+        seen = sum(1 for i in range(children)
+                   if backend.get('child_{}'.format(i)) is not None)
+        backend.clear()
+
+        for i in range(1000):
+            backend.add('session_{}'.format(i), 'user_{}'.format(i))
+        gets = []
+        for i in range(number):
+            session_id = 'session_{}'.format(i % 1000)
+            start = time.perf_counter()
+            backend.get(session_id)
+            gets.append(time.perf_counter() - start)
+        cycles = []
+        for i in range(number // 10):
+            session_id = 'cycle_{}'.format(i)
+            start = time.perf_counter()
+            backend.add(session_id, 'user')
+            backend.pop(session_id)
+            cycles.append(time.perf_counter() - start)
+        backend.clear()
+        print("{:<8} {:>10.1f} {:>10.1f} {:>10.1f} {:>10.1f}  {}/{}".format(
+            name, *percentiles(gets), *percentiles(cycles), seen, children))
+    server.shutdown()
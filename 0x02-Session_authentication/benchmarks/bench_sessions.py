@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+""" Multi-threaded stress benchmark of the SessionAuth session map
+
+Threads create sessions, look them up, then all race to destroy every
+session. Each run checks that lookups return the right user, that every
+session is destroyed exactly once and that the map ends up empty.
+Compares the map split in 16 shards with the same map behind one lock.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_sessions [sessions_per_thread]
+"""
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault('SESSION_NAME', '_my_session_id')
+
+from api.v1.auth.session_auth import SessionAuth  # noqa: E402
+from api.v1.auth.session_map import ShardedSessionMap  # noqa: E402
+
+
+class Request():
+    """ Minimal request carrying a session cookie
+    """
+
+    def __init__(self, session_id: str):
+        """ Initialize a Request with its cookie
+        """
+        self.cookies = {os.environ['SESSION_NAME']: session_id}
+
+
+def stress(auth: SessionAuth, threads: int, n: int) -> dict:
+    """ Run the three phases on threads threads, return timings and errors
+    """
+    session_ids = [[] for _ in range(threads)]
+    destroyed = [0] * threads
+    errors = []
+    barrier = threading.Barrier(threads)
+
+    def worker(i: int):
+        """ Create, look up, then destroy sessions
+        """
+        user_id = 'user_{}'.format(i)
+        try:
+            barrier.wait()
+            for _ in range(n):
+                session_ids[i].append(auth.create_session(user_id))
+            for session_id in session_ids[i]:
+                if auth.user_id_for_session_id(session_id) != user_id:
+                    errors.append('lookup')
+            barrier.wait()
+            # Every thread destroys every session: only one may succeed
+            for ids in session_ids:
+                for session_id in ids:
+                    if auth.destroy_session(Request(session_id)):
+                        destroyed[i] += 1
+        except Exception as e:
+            errors.append(type(e).__name__)
+
+    workers = [threading.Thread(target=worker, args=(i,))
+               for i in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    created = sum(len(ids) for ids in session_ids)
+    if len(set(sid for ids in session_ids for sid in ids)) != created:
+        errors.append('duplicate id')
+    if sum(destroyed) != created:
+        errors.append('destroyed {} of {}'.format(sum(destroyed), created))
+    if len(auth.user_id_by_session_id) != 0:
+        errors.append('left over')
+    return {'seconds': elapsed, 'ops': created * (2 + threads),
+            'errors': sorted(set(errors))}
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    maps = {
+        'one lock': lambda: ShardedSessionMap(1),
+        'sharded': lambda: ShardedSessionMap(16),
+    }
+    print("{:<10} {:>8} {:>12} {}".format(
+        'map', 'threads', 'kops/s', 'errors'))
+    for name, factory in maps.items():
+        for threads in (1, 2, 4, 8):
+            auth = SessionAuth()
+            auth.user_id_by_session_id = factory()
+            result = stress(auth, threads, n)
+            print("{:<10} {:>8} {:>12.1f} {}".format(
+                name, threads, result['ops'] / result['seconds'] / 1000,
+                ', '.join(result['errors']) or '-'))
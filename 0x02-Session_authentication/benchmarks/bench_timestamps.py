@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+""" Benchmark of load_from_file throughput per timestamp decoding mode
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_timestamps [number_of_users]
+"""
+from datetime import datetime
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_load import generate
+from models import base
+from models.user import User
+
+
+def strptime(value: str) -> datetime:
+    """ Decoding used before the fast path
+    """
+    return datetime.strptime(value, base.TIMESTAMP_FORMAT)
+
+
+def measure(name: str, n: int):
+    """ Load the store once and print the throughput
+    """
+    start = time.perf_counter()
+    User.load_from_file()
+    elapsed = time.perf_counter() - start
+    print("{:<10} {:>8.3f} s {:>12.0f} obj/s".format(
+        name, elapsed, n / elapsed))
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    os.chdir(tempfile.mkdtemp())
+    generate(".db_User.json", n)
+    print("{} users".format(n))
+
+    parse_timestamp = base.parse_timestamp
+    base.parse_timestamp = strptime
+    measure("strptime", n)
+    base.parse_timestamp = parse_timestamp
+    measure("fast", n)
+    base.LAZY_TIMESTAMPS = True
+    measure("lazy", n)
+    # First read of the lazy attributes pays the decoding
+    start = time.perf_counter()
+    for user in User.all():
+        user.created_at, user.updated_at
+    print("lazy first read of every timestamp: {:.3f} s".format(
+        time.perf_counter() - start))
+    os.remove(".db_User.json")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+""" Bulk import of users into the models.user.User store
+
+Streams users from a CSV file (with a header) or an NDJSON file, one
+object per line, with the fields email, password and optionally
+first_name and last_name. Passwords are hashed in parallel on every
+core, and each batch of users is saved with a single write.
+
+The number of input records done is kept in <input>.progress after each
+batch, so an interrupted import resumes where it stopped; emails
+already in the store are skipped, so replaying a batch is harmless.
+
+Usage (from the project root):
+    python3 import_users.py users.csv [--batch-size N] [--workers N]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count, path, remove, replace
+from typing import Iterator
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+
+from models.hashers import make_password
+from models.user import User
+
+
+def read_records(file_path: str, file_format: str = None) -> Iterator[dict]:
+    """ Iterate over the records of a CSV or NDJSON file
+    """
+    if file_format is None:
+        file_format = 'csv' if file_path.endswith('.csv') else 'ndjson'
+    with open(file_path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_progress(state_path: str) -> int:
+    """ Return the number of records already imported
+    """
+    if not path.exists(state_path):
+        return 0
+    with open(state_path) as f:
+        return json.load(f)['records']
+
+
+def save_progress(state_path: str, records: int):
+    """ Record the number of records imported, atomically
+    """
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'records': records}, f)
+    replace(tmp_path, state_path)
+
+
+def import_batch(pool: ProcessPoolExecutor, records: list,
+                 workers: int) -> tuple:
+    """ Hash the passwords of a batch in parallel and save its new users
+    with one write
+
+    Return (imported, skipped) counts.
+    """
+    valid = []
+    emails = set()
+    for record in records:
+        email = record.get('email')
+        if not email or not record.get('password') or email in emails:
+            continue
+        if len(User.search({'email': email})) > 0:
+            continue
+        emails.add(email)
+        valid.append(record)
+    chunksize = max(1, len(valid) // (4 * workers))
+    hashes = pool.map(make_password, [r['password'] for r in valid],
+                      chunksize=chunksize)
+    users = []
+    for record, hashed in zip(valid, hashes):
+        users.append(User(email=record['email'], _password=hashed,
+                          first_name=record.get('first_name') or None,
+                          last_name=record.get('last_name') or None))
+    User.bulk_save(users)
+    return len(users), len(records) - len(users)
+
+
+def main(argv: list = None):
+    """ Run the import command
+    """
+    parser = argparse.ArgumentParser(description="Bulk import users")
+    parser.add_argument('input', help="CSV or NDJSON file")
+    parser.add_argument('--format', choices=('csv', 'ndjson'),
+                        help="input format, from the extension by default")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=cpu_count() or 1)
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore the progress of a previous run")
+    args = parser.parse_args(argv)
+
+    state_path = args.input + '.progress'
+    done = 0 if args.restart else load_progress(state_path)
+    User.load_from_file()
+    records = itertools.islice(read_records(args.input, args.format),
+                               done, None)
+    imported = skipped = 0
+    start = time.monotonic()
+    if done > 0:
+        print("resuming after {} records".format(done), file=sys.stderr)
+    with ProcessPoolExecutor(args.workers) as pool:
+        while True:
+            batch = list(itertools.islice(records, args.batch_size))
+            if len(batch) == 0:
+                break
+            counts = import_batch(pool, batch, args.workers)
+            imported += counts[0]
+            skipped += counts[1]
+            done += len(batch)
+            # The batch must be on disk, not just handed to the background
+            # flusher, before the progress moves past it
+            User.flush()
+            save_progress(state_path, done)
+            elapsed = time.monotonic() - start
+            print("{} records done, {} imported, {} skipped, {:.1f} "
+                  "users/s".format(done, imported, skipped,
+                                   imported / elapsed), file=sys.stderr)
+    if path.exists(state_path):
+        remove(state_path)
+    print("imported {} users, skipped {}, in {:.1f}s".format(
+        imported, skipped, time.monotonic() - start))
+
+
+if __name__ == "__main__":
+    main()
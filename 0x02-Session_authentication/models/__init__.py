@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+""" Models package: selects the storage engine behind models.base.Base
+"""
+from os import getenv
+
+
+storage = None
+storage_type = getenv('STORAGE_TYPE')
+if storage_type == 'sqlite':
+    from models.engine.sqlite_storage import SQLiteStorage
+    storage = SQLiteStorage()
+else:
+    from models.engine.file_storage import FileStorage
+    storage = FileStorage()
@@ -2,38 +2,94 @@
 """ Base module
 """
 from datetime import datetime
-from typing import TypeVar, List, Iterable
-from os import path
-import json
+from typing import TypeVar, List, Iterable, Iterator
+from os import getenv
+import models
 import uuid
 
 
 TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%S"
-DATA = {}
+
+# Lazy timestamps: keep created_at/updated_at as the raw string read from
+# disk and only decode them the first time they are read
+LAZY_TIMESTAMPS = getenv('DB_LAZY_TIMESTAMPS', '').lower() in (
+    '1', 'true', 'on')
+
+
+def parse_timestamp(value: str) -> datetime:
+    """ Decode a TIMESTAMP_FORMAT string, e.g. 2024-01-31T23:59:59
+
+    The exact layout is decoded by datetime.fromisoformat, which is much
+    faster than strptime; anything else goes through strptime as before.
+    """
+    if len(value) == 19 and value[4:17:3] == '--T::':
+        return datetime.fromisoformat(value)
+    return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+class Timestamp():
+    """ datetime attribute stored in a slot, decoded on first read while
+    the slot still holds a raw TIMESTAMP_FORMAT string
+    """
+
+    def __init__(self, slot: str):
+        """ Initialize a Timestamp backed by slot
+        """
+        self.slot = slot
+        self.member = None
+
+    def __set_name__(self, owner: type, name: str):
+        """ Bind the slot descriptor of the owner class
+        """
+        self.member = owner.__dict__[self.slot]
+
+    def __get__(self, obj, objtype: type = None) -> datetime:
+        """ Return the decoded value, caching it in the slot
+        """
+        if obj is None:
+            return self
+        value = self.member.__get__(obj, objtype)
+        if type(value) is str:
+            value = parse_timestamp(value)
+            self.member.__set__(obj, value)
+        return value
+
+    def __set__(self, obj, value):
+        """ Store a datetime or a raw timestamp string
+        """
+        self.member.__set__(obj, value)
+
+    def raw(self, obj):
+        """ Return the stored value without decoding it
+        """
+        return self.member.__get__(obj, type(obj))
 
 
 class Base():
     """ Base class
     """
 
+    # Instances keep their attributes in slots rather than a __dict__;
+    # subclasses list their own attributes in __slots__ as well
+    __slots__ = ('id', '_created_at', '_updated_at')
+
+    created_at = Timestamp('_created_at')
+    updated_at = Timestamp('_updated_at')
+
+    # Attributes with a secondary index used by search()
+    __indexes__ = ()
+
     def __init__(self, *args: list, **kwargs: dict):
         """ Initialize a Base instance
         """
-        s_class = str(self.__class__.__name__)
-        if DATA.get(s_class) is None:
-            DATA[s_class] = {}
-
         self.id = kwargs.get('id', str(uuid.uuid4()))
-        if kwargs.get('created_at') is not None:
-            self.created_at = datetime.strptime(kwargs.get('created_at'),
-                                                TIMESTAMP_FORMAT)
-        else:
-            self.created_at = datetime.utcnow()
-        if kwargs.get('updated_at') is not None:
-            self.updated_at = datetime.strptime(kwargs.get('updated_at'),
-                                                TIMESTAMP_FORMAT)
-        else:
-            self.updated_at = datetime.utcnow()
+        for key in ('created_at', 'updated_at'):
+            value = kwargs.get(key)
+            if value is None:
+                value = datetime.utcnow()
+            elif not LAZY_TIMESTAMPS:
+                value = parse_timestamp(value)
+            setattr(self, key, value)
 
     def __eq__(self, other: TypeVar('Base')) -> bool:
         """ Equality
@@ -44,11 +100,43 @@ class Base():
             return False
         return (self.id == other.id)
 
+    @classmethod
+    def attributes(cls) -> tuple:
+        """ Return the slotted attribute names, base classes first
+        """
+        if '_attributes' not in cls.__dict__:
+            names = []
+            for klass in reversed(cls.__mro__):
+                # Slots behind a Timestamp are exposed by its public name
+                public = {}
+                for name, value in klass.__dict__.items():
+                    if isinstance(value, Timestamp):
+                        public[value.slot] = name
+                for name in klass.__dict__.get('__slots__', ()):
+                    if name not in ('__dict__', '__weakref__'):
+                        names.append(public.get(name, name))
+            cls._attributes = tuple(names)
+        return cls._attributes
+
     def to_json(self, for_serialization: bool = False) -> dict:
         """ Convert the object a JSON dictionary
         """
         result = {}
-        for key, value in self.__dict__.items():
+        items = []
+        for key in self.__class__.attributes():
+            attribute = getattr(self.__class__, key)
+            try:
+                if isinstance(attribute, Timestamp):
+                    # Lazy timestamps are copied out without decoding
+                    items.append((key, attribute.raw(self)))
+                else:
+                    items.append((key, getattr(self, key)))
+            except AttributeError:
+                # Slot never assigned
+                continue
+        # Subclasses without __slots__ still get a __dict__
+        items.extend(getattr(self, '__dict__', {}).items())
+        for key, value in items:
             if not for_serialization and key[0] == '_':
                 continue
             if type(value) is datetime:
@@ -61,77 +149,98 @@ class Base():
     def load_from_file(cls):
         """ Load all objects from file
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        DATA[s_class] = {}
-        if not path.exists(file_path):
-            return
+        models.storage.load(cls)
 
-        with open(file_path, 'r') as f:
-            objs_json = json.load(f)
-            for obj_id, obj_json in objs_json.items():
-                DATA[s_class][obj_id] = cls(**obj_json)
+    @classmethod
+    def refresh(cls):
+        """ Reload objects only if the storage changed since last read
+        """
+        models.storage.refresh(cls)
 
     @classmethod
     def save_to_file(cls):
         """ Save all objects to file
         """
-        s_class = cls.__name__
-        file_path = ".db_{}.json".format(s_class)
-        objs_json = {}
-        for obj_id, obj in DATA[s_class].items():
-            objs_json[obj_id] = obj.to_json(True)
+        models.storage.dump(cls)
 
-        with open(file_path, 'w') as f:
-            json.dump(objs_json, f)
+    @staticmethod
+    def transaction():
+        """ Group the saves and removes of the block into one write, or
+        undo them if the block raises
+
+        Nested blocks join the outermost one.
+        """
+        return models.storage.transaction()
+
+    @staticmethod
+    def flush():
+        """ Write the mutations still buffered by the storage engine
+        """
+        models.storage.flush()
+
+    @classmethod
+    def bulk_save(cls, objs: Iterable[TypeVar('Base')]):
+        """ Save many objects with a single write
+        """
+        with models.storage.transaction():
+            for obj in objs:
+                models.storage.save(obj)
+
+    @classmethod
+    def bulk_remove(cls, objs: Iterable[TypeVar('Base')]):
+        """ Remove many objects with a single write
+        """
+        with models.storage.transaction():
+            for obj in objs:
+                models.storage.remove(obj)
 
     def save(self):
         """ Save current object
         """
-        s_class = self.__class__.__name__
-        self.updated_at = datetime.utcnow()
-        DATA[s_class][self.id] = self
-        self.__class__.save_to_file()
+        models.storage.save(self)
 
     def remove(self):
         """ Remove object
         """
-        s_class = self.__class__.__name__
-        if DATA[s_class].get(self.id) is not None:
-            del DATA[s_class][self.id]
-            self.__class__.save_to_file()
+        models.storage.remove(self)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """ Return the storage metrics of the class
+        """
+        return models.storage.stats(cls)
 
     @classmethod
     def count(cls) -> int:
         """ Count all objects
         """
-        s_class = cls.__name__
-        return len(DATA[s_class].keys())
+        return models.storage.count(cls)
 
     @classmethod
     def all(cls) -> Iterable[TypeVar('Base')]:
         """ Return all objects
         """
-        return cls.search()
+        return models.storage.all(cls)
 
     @classmethod
     def get(cls, id: str) -> TypeVar('Base'):
         """ Return one object by ID
         """
-        s_class = cls.__name__
-        return DATA[s_class].get(id)
+        return models.storage.get(cls, id)
 
     @classmethod
     def search(cls, attributes: dict = {}) -> List[TypeVar('Base')]:
         """ Search all objects with matching attributes
         """
-        s_class = cls.__name__
-        def _search(obj):
-            if len(attributes) == 0:
-                return True
-            for k, v in attributes.items():
-                if (getattr(obj, k) != v):
-                    return False
-            return True
-        
-        return list(filter(_search, DATA[s_class].values()))
+        return models.storage.search(cls, attributes)
+
+    @classmethod
+    def query(cls, attributes: dict = {}, order_by: str = None,
+              limit: int = None,
+              offset: int = 0) -> Iterator[TypeVar('Base')]:
+        """ Iterate lazily over the objects matching attributes, which
+        may use operators (e.g. {'created_at__lt': t}, see models.query),
+        ordered by order_by ('-' prefix for descending) and sliced
+        """
+        return models.storage.query(cls, attributes, order_by, limit,
+                                    offset)
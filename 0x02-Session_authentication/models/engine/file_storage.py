@@ -0,0 +1,637 @@
+#!/usr/bin/env python3
+""" FileStorage module: objects held in DATA, persisted to JSON files
+"""
+from datetime import datetime
+from typing import TypeVar, Iterable, Iterator, List
+from contextlib import contextmanager
+from os import fchmod, fdopen, fsync, getenv, path, remove, replace, stat
+from models.engine.storage import STATS, Storage
+from models.loader import iter_items, peak_rss_kb
+from models.query import Condition, parse, run
+import atexit
+import json
+import tempfile
+import threading
+import time
+
+
+DATA = {}
+
+# Journaled mode: save/remove append one record to .db_<Class>.log
+# instead of rewriting the whole .db_<Class>.json snapshot
+JOURNAL = getenv('DB_JOURNAL', '').lower() in ('1', 'true', 'on')
+
+# Secondary indexes: {class name: {attribute: Index}}
+INDEXES = {}
+
+# State of the files each class was last read from or written to:
+# {class name: (snapshot signature, journal signature)}
+SIGNATURES = {}
+
+# Unit of work open in the current thread, if any
+_LOCAL = threading.local()
+
+# Units of work of every thread not yet committed or rolled back; their
+# mutations are in DATA but kept out of the snapshots
+OPEN_UNITS = set()
+
+# Guards DATA and the indexes against the background flusher
+LOCK = threading.RLock()
+
+# Serializes journal appends, snapshots and compactions
+FILE_LOCK = threading.RLock()
+
+# Journal compaction: the log is folded into a new snapshot once it is
+# DB_COMPACT_RATIO times as large as the snapshot, and at least
+# DB_COMPACT_MIN_BYTES long
+try:
+    COMPACT_RATIO = float(getenv('DB_COMPACT_RATIO', 1.0))
+except ValueError:
+    COMPACT_RATIO = 1.0
+try:
+    COMPACT_MIN_BYTES = int(getenv('DB_COMPACT_MIN_BYTES', 1 << 20))
+except ValueError:
+    COMPACT_MIN_BYTES = 1 << 20
+
+# Asynchronous persistence: committed mutations are written by a
+# background thread after DB_FLUSH_DELAY seconds, or sooner once
+# DB_FLUSH_THRESHOLD objects are dirty
+try:
+    FLUSH_DELAY = float(getenv('DB_FLUSH_DELAY', 0))
+except ValueError:
+    FLUSH_DELAY = 0
+try:
+    FLUSH_THRESHOLD = int(getenv('DB_FLUSH_THRESHOLD', 1000))
+except ValueError:
+    FLUSH_THRESHOLD = 1000
+
+
+def file_signature(file_path: str) -> tuple:
+    """ Return (inode, size, mtime) of a file, or None if it is missing
+    """
+    try:
+        st = stat(file_path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+
+def resized(signature: tuple, size: int) -> tuple:
+    """ Return a file signature with its size replaced
+    """
+    if signature is None:
+        return None
+    return (signature[0], size, signature[2])
+
+
+class Index():
+    """ Hash index of the stored objects of a class on one attribute
+    """
+
+    def __init__(self, attribute: str):
+        """ Initialize an empty Index
+        """
+        self.attribute = attribute
+        self.objs_by_value = {}
+        self.value_by_id = {}
+
+    def add(self, obj: TypeVar('Base')):
+        """ Index an object, replacing its previously indexed value
+        """
+        self.discard(obj.id)
+        value = getattr(obj, self.attribute, None)
+        self.objs_by_value.setdefault(value, {})[obj.id] = obj
+        self.value_by_id[obj.id] = value
+
+    def discard(self, obj_id: str):
+        """ Remove an object from the index
+        """
+        if obj_id not in self.value_by_id:
+            return
+        value = self.value_by_id.pop(obj_id)
+        objs = self.objs_by_value[value]
+        del objs[obj_id]
+        if len(objs) == 0:
+            del self.objs_by_value[value]
+
+    def lookup(self, value) -> List[TypeVar('Base')]:
+        """ Return all objects indexed under value
+        """
+        return list(self.objs_by_value.get(value, {}).values())
+
+
+class UnitOfWork():
+    """ Mutations applied to DATA and written to disk once at commit
+    """
+
+    def __init__(self, storage: 'FileStorage'):
+        """ Initialize an empty UnitOfWork
+        """
+        self.storage = storage
+        # {class: {object id: (op, object)}}, last mutation wins
+        self.records = {}
+        # (class, object id, previous object, previous updated_at)
+        self.undo = []
+
+    def save(self, obj: TypeVar('Base')):
+        """ Store obj in DATA and queue its record
+        """
+        cls = obj.__class__
+        with LOCK:
+            objs = self.storage.objects(cls)
+            previous = objs.get(obj.id)
+            self.undo.append((cls, obj.id, previous, obj.updated_at))
+            obj.updated_at = datetime.utcnow()
+            objs[obj.id] = obj
+            for index in self.storage.indexes(cls).values():
+                index.add(obj)
+        self.records.setdefault(cls, {})[obj.id] = ('save', obj)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Drop obj from DATA and queue its record
+        """
+        cls = obj.__class__
+        with LOCK:
+            previous = self.storage.objects(cls).pop(obj.id, None)
+            if previous is None:
+                return
+            self.undo.append((cls, obj.id, previous, previous.updated_at))
+            for index in self.storage.indexes(cls).values():
+                index.discard(obj.id)
+        self.records.setdefault(cls, {})[obj.id] = ('remove', obj)
+
+    def exclude(self, cls: type, objs: dict):
+        """ Put the objects of cls changed by this unit of work back as
+        they were before it in objs, a copy of the DATA of cls
+
+        As in rollback, attributes changed on the objects themselves are
+        not restored.
+        """
+        seen = set()
+        for undo_cls, obj_id, previous, _ in self.undo:
+            if undo_cls is not cls or obj_id in seen:
+                continue
+            # The first mutation of an object holds its committed state
+            seen.add(obj_id)
+            if previous is None:
+                objs.pop(obj_id, None)
+            else:
+                objs[obj_id] = previous
+
+    def commit(self):
+        """ Write every dirty class once, or hand them to the flusher
+        """
+        with LOCK:
+            OPEN_UNITS.discard(self)
+        if FLUSHER is not None:
+            FLUSHER.submit(self.records)
+        else:
+            self.storage.write(self.records)
+        self.records = {}
+        self.undo = []
+
+    def rollback(self):
+        """ Put DATA and the indexes back as they were before the mutations
+
+        Attributes changed on the objects themselves, other than
+        updated_at, are not restored.
+        """
+        with LOCK:
+            for cls, obj_id, previous, updated_at in reversed(self.undo):
+                objs = self.storage.objects(cls)
+                indexes = self.storage.indexes(cls).values()
+                current = objs.pop(obj_id, None)
+                if current is not None:
+                    for index in indexes:
+                        index.discard(obj_id)
+                if previous is not None:
+                    previous.updated_at = updated_at
+                    objs[obj_id] = previous
+                    for index in indexes:
+                        index.add(previous)
+                elif current is not None:
+                    current.updated_at = updated_at
+            OPEN_UNITS.discard(self)
+        self.records = {}
+        self.undo = []
+
+
+class Flusher():
+    """ Background thread coalescing committed mutations into group writes
+    """
+
+    def __init__(self, storage: 'FileStorage', delay: float,
+                 threshold: int):
+        """ Initialize an idle Flusher
+        """
+        self.storage = storage
+        self.delay = delay
+        self.threshold = threshold
+        # {class: {object id: (op, object)}} waiting to be written
+        self.pending = {}
+        self.dirty = 0
+        self.condition = threading.Condition()
+        self.writing = threading.Lock()
+        self.thread = None
+
+    def submit(self, records: dict):
+        """ Merge committed records into the pending ones
+        """
+        with self.condition:
+            for cls, class_records in records.items():
+                pending = self.pending.setdefault(cls, {})
+                for obj_id, record in class_records.items():
+                    if obj_id not in pending:
+                        self.dirty += 1
+                    pending[obj_id] = record
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, daemon=True,
+                                               name='base-flusher')
+                self.thread.start()
+            self.condition.notify()
+
+    def flush(self):
+        """ Write everything pending now
+        """
+        with self.writing:
+            with self.condition:
+                records, self.pending, self.dirty = self.pending, {}, 0
+            if len(records) == 0:
+                return
+            try:
+                self.storage.write(records)
+            except Exception:
+                # Keep the records unless newer ones superseded them
+                with self.condition:
+                    for cls, class_records in records.items():
+                        pending = self.pending.setdefault(cls, {})
+                        for obj_id, record in class_records.items():
+                            if obj_id not in pending:
+                                self.dirty += 1
+                                pending[obj_id] = record
+                raise
+
+    def run(self):
+        """ Flush DB_FLUSH_DELAY seconds after the first mutation, or as
+        soon as DB_FLUSH_THRESHOLD objects are dirty
+        """
+        while True:
+            with self.condition:
+                while len(self.pending) == 0:
+                    self.condition.wait()
+                deadline = time.monotonic() + self.delay
+                while self.dirty < self.threshold:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+            try:
+                self.flush()
+            except Exception:
+                # Retried with the next batch
+                time.sleep(self.delay)
+
+
+FLUSHER = None
+
+
+class FileStorage(Storage):
+    """ Default engine: every object in memory, one JSON file per class
+    """
+
+    def __init__(self):
+        """ Initialize the engine and its background flusher, if enabled
+        """
+        global FLUSHER
+        if FLUSH_DELAY > 0 and FLUSHER is None:
+            FLUSHER = Flusher(self, FLUSH_DELAY, FLUSH_THRESHOLD)
+            atexit.register(FLUSHER.flush)
+
+    def objects(self, cls: type) -> dict:
+        """ Return the {id: object} dict of cls in DATA
+        """
+        s_class = cls.__name__
+        if DATA.get(s_class) is None:
+            DATA[s_class] = {}
+        return DATA[s_class]
+
+    def indexes(self, cls: type) -> dict:
+        """ Return the secondary indexes of cls
+        """
+        s_class = cls.__name__
+        if INDEXES.get(s_class) is None:
+            INDEXES[s_class] = {}
+            for attribute in cls.__indexes__:
+                INDEXES[s_class][attribute] = Index(attribute)
+        return INDEXES[s_class]
+
+    def rebuild_indexes(self, cls: type):
+        """ Rebuild the secondary indexes of cls from DATA
+        """
+        INDEXES.pop(cls.__name__, None)
+        indexes = self.indexes(cls)
+        for obj in self.objects(cls).values():
+            for index in indexes.values():
+                index.add(obj)
+
+    def load(self, cls: type):
+        """ Load all objects from file, then replay the journal on top
+
+        Entries are parsed and instantiated one at a time, so the raw file
+        and the parsed dicts are never held in memory all at once.
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        start = time.perf_counter()
+        # Mutations still waiting for the flusher must reach the disk
+        # before DATA is rebuilt from it
+        self.flush()
+        with FILE_LOCK:
+            signature = self.signature(cls)
+            DATA[s_class] = {}
+            if path.exists(file_path):
+                for obj_id, obj_json in iter_items(file_path):
+                    DATA[s_class][obj_id] = cls(**obj_json)
+            log_size = self.replay_log(cls)
+            self.rebuild_indexes(cls)
+            # Only the records read so far are known
+            SIGNATURES[s_class] = (signature[0],
+                                   resized(signature[1], log_size))
+        STATS.setdefault(s_class, {})['load'] = {
+            'objects': len(DATA[s_class]),
+            'seconds': time.perf_counter() - start,
+            'peak_rss_kb': peak_rss_kb(),
+        }
+
+    def replay_log(self, cls: type, offset: int = 0,
+                   indexes: Iterable[Index] = ()) -> int:
+        """ Apply the journal records of .db_<Class>.log found after
+        offset to DATA and to indexes
+
+        Return the offset following the last complete record.
+        """
+        objs = self.objects(cls)
+        log_path = ".db_{}.log".format(cls.__name__)
+        if not path.exists(log_path):
+            return 0
+
+        with open(log_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError(line)
+                    op, payload = json.loads(line)
+                except ValueError:
+                    # Torn last record of an interrupted append
+                    break
+                offset += len(line)
+                if op == 'save':
+                    obj = objs[payload['id']] = cls(**payload)
+                    for index in indexes:
+                        index.add(obj)
+                elif op == 'remove':
+                    objs.pop(payload, None)
+                    for index in indexes:
+                        index.discard(payload)
+        return offset
+
+    def signature(self, cls: type) -> tuple:
+        """ Return the current signatures of the snapshot and journal
+        of cls
+        """
+        s_class = cls.__name__
+        return (file_signature(".db_{}.json".format(s_class)),
+                file_signature(".db_{}.log".format(s_class)))
+
+    @staticmethod
+    def log_offset(known: tuple, current: tuple) -> int:
+        """ Return the journal offset from which replaying brings known
+        files up to date with current ones, or None if a load is needed
+        """
+        if known is None or known[0] != current[0] or current[1] is None:
+            return None
+        if known[1] is None:
+            return 0
+        if known[1][0] != current[1][0] or known[1][1] > current[1][1]:
+            # Journal replaced or truncated
+            return None
+        return known[1][1]
+
+    def refresh(self, cls: type):
+        """ Reload the objects of cls only if their files changed since
+        this process last read or wrote them
+
+        When only the journal grew, just the new records are replayed.
+        """
+        s_class = cls.__name__
+        stats = STATS.setdefault(s_class, {}).setdefault(
+            'refresh', {'checks': 0, 'loads': 0, 'replays': 0})
+        stats['checks'] += 1
+        if SIGNATURES.get(s_class) == self.signature(cls):
+            return
+        # Our own pending mutations must not be replayed over
+        self.flush()
+        with FILE_LOCK:
+            known = SIGNATURES.get(s_class)
+            current = self.signature(cls)
+            if known == current:
+                return
+            offset = self.log_offset(known, current)
+            if offset is not None and s_class in DATA:
+                with LOCK:
+                    size = self.replay_log(cls, offset,
+                                           list(self.indexes(cls).values()))
+                SIGNATURES[s_class] = (current[0],
+                                       resized(current[1], size))
+                stats['replays'] += 1
+                return
+        stats['loads'] += 1
+        self.load(cls)
+
+    def append_to_log(self, cls: type, records: list):
+        """ Append journal records: ('save', obj_json) or ('remove', id)
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        log_path = ".db_{}.log".format(s_class)
+        lines = [json.dumps(list(record), separators=(',', ':')) + '\n'
+                 for record in records]
+        with FILE_LOCK:
+            known = SIGNATURES.get(s_class)
+            previous = self.signature(cls)
+            with open(log_path, 'ab') as f:
+                f.write(''.join(lines).encode('utf-8'))
+                log_size = f.tell()
+            if known == previous:
+                # Nobody else wrote since we last looked: still in sync
+                SIGNATURES[s_class] = self.signature(cls)
+            if log_size < COMPACT_MIN_BYTES:
+                return
+            snapshot_size = 0
+            if path.exists(file_path):
+                snapshot_size = path.getsize(file_path)
+            if log_size >= COMPACT_RATIO * snapshot_size:
+                self.compact(cls)
+
+    def compact(self, cls: type):
+        """ Fold the journal into a new snapshot
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        start = time.perf_counter()
+        with FILE_LOCK:
+            self.dump(cls)
+            size = path.getsize(file_path)
+        elapsed = time.perf_counter() - start
+        stats = STATS.setdefault(s_class, {}).setdefault(
+            'compact', {'count': 0, 'seconds': 0.0, 'bytes': 0})
+        stats['count'] += 1
+        stats['seconds'] += elapsed
+        stats['bytes'] += size
+        stats['last_seconds'] = elapsed
+        stats['last_bytes'] = size
+
+    def dump(self, cls: type):
+        """ Save all objects to file and reset the journal
+
+        The snapshot is written to a temporary file of its own, synced and
+        renamed over the previous one, so neither a crash nor a concurrent
+        writer ever leaves a truncated store.
+        """
+        s_class = cls.__name__
+        file_path = ".db_{}.json".format(s_class)
+        log_path = ".db_{}.log".format(s_class)
+        with FILE_LOCK:
+            objs_json = {}
+            with LOCK:
+                objs = dict(self.objects(cls))
+                # Uncommitted mutations of other threads stay off disk
+                for uow in OPEN_UNITS:
+                    uow.exclude(cls, objs)
+            for obj_id, obj in objs.items():
+                objs_json[obj_id] = obj.to_json(True)
+
+            # Unique name: other processes may be dumping the same class
+            fd, tmp_path = tempfile.mkstemp(
+                dir='.', prefix='.db_{}.'.format(s_class), suffix='.tmp')
+            try:
+                with fdopen(fd, 'w') as f:
+                    # mkstemp files are private; keep the usual permissions
+                    fchmod(f.fileno(), 0o644)
+                    json.dump(objs_json, f)
+                    f.flush()
+                    fsync(f.fileno())
+                replace(tmp_path, file_path)
+            except BaseException:
+                if path.exists(tmp_path):
+                    remove(tmp_path)
+                raise
+            # Records are full object states, so replaying a stale log on
+            # top of the new snapshot is harmless if we stop right here
+            if path.exists(log_path):
+                remove(log_path)
+            SIGNATURES[s_class] = self.signature(cls)
+
+    def write(self, records: dict):
+        """ Persist {class: {object id: (op, object)}}, one write per class
+        """
+        for cls, class_records in records.items():
+            start = time.perf_counter()
+            if JOURNAL:
+                self.append_to_log(cls, [
+                    (op, obj.to_json(True) if op == 'save' else obj.id)
+                    for op, obj in class_records.values()])
+            else:
+                self.dump(cls)
+            stats = STATS.setdefault(cls.__name__, {}).setdefault(
+                'write', {'writes': 0, 'records': 0, 'seconds': 0.0})
+            stats['writes'] += 1
+            stats['records'] += len(class_records)
+            stats['seconds'] += time.perf_counter() - start
+
+    @contextmanager
+    def transaction(self):
+        """ Group the saves and removes of the block into one write per
+        class at exit, or undo them in DATA if the block raises
+
+        Binds the UnitOfWork of the outermost block.
+        """
+        if getattr(_LOCAL, 'uow', None) is not None:
+            yield _LOCAL.uow
+            return
+        uow = _LOCAL.uow = UnitOfWork(self)
+        with LOCK:
+            OPEN_UNITS.add(uow)
+        try:
+            yield uow
+            uow.commit()
+        except BaseException:
+            uow.rollback()
+            raise
+        finally:
+            _LOCAL.uow = None
+            with LOCK:
+                OPEN_UNITS.discard(uow)
+
+    def flush(self):
+        """ Write the mutations waiting for the background flusher
+        """
+        if FLUSHER is not None:
+            FLUSHER.flush()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Save an object through the current unit of work
+        """
+        with self.transaction() as uow:
+            uow.save(obj)
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Remove an object through the current unit of work
+        """
+        with self.transaction() as uow:
+            uow.remove(obj)
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        return len(self.objects(cls))
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        return self.objects(cls).get(id)
+
+    def plan(self, cls: type,
+             conditions: List[Condition]) -> Iterable[TypeVar('Base')]:
+        """ Return the candidates of a query: the objects found through
+        the first equality or membership test on an indexed attribute,
+        or every object
+        """
+        indexes = self.indexes(cls)
+        for c in conditions:
+            index = indexes.get(c.attribute)
+            if index is None or c.op not in ('eq', 'in'):
+                continue
+            try:
+                if c.op == 'eq':
+                    return index.lookup(c.value)
+                objs = {}
+                for value in c.value:
+                    for obj in index.lookup(value):
+                        objs[obj.id] = obj
+                return list(objs.values())
+            except TypeError:
+                # Unhashable value: try another condition
+                continue
+        with LOCK:
+            return list(self.objects(cls).values())
+
+    def query(self, cls: type, attributes: dict = {}, order_by: str = None,
+              limit: int = None,
+              offset: int = 0) -> Iterator[TypeVar('Base')]:
+        """ Iterate lazily over the objects matching a query
+        """
+        conditions = parse(attributes)
+        objs = self.plan(cls, conditions)
+        return run(objs, conditions, order_by, limit, offset)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+""" SQLiteStorage module: objects persisted in an embedded SQLite database
+"""
+from datetime import datetime
+from typing import TypeVar, Iterator
+from contextlib import contextmanager
+from os import getenv
+from models.base import TIMESTAMP_FORMAT
+from models.engine.storage import STATS, Storage
+from models.query import Condition, parse, run
+import json
+import sqlite3
+import threading
+import time
+
+
+class SQLiteStorage(Storage):
+    """ Engine keeping one table per class, rows loaded on demand
+
+    Each row holds the id and the to_json(True) document of an object;
+    attributes listed in __indexes__ get an index on their JSON value.
+    """
+
+    def __init__(self, db_path: str = None):
+        """ Initialize the engine on db_path (STORAGE_SQLITE_PATH)
+        """
+        if db_path is None:
+            db_path = getenv('STORAGE_SQLITE_PATH', '.db.sqlite3')
+        self.db_path = db_path
+        # sqlite3 connections are used by the thread that opened them
+        self.local = threading.local()
+        self.tables = set()
+        self.tables_lock = threading.Lock()
+
+    def connection(self) -> sqlite3.Connection:
+        """ Return the connection of the current thread
+        """
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            # Autocommit, transactions are opened explicitly
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self.local.conn = conn
+        return conn
+
+    def table(self, cls: type) -> str:
+        """ Create the table and indexes of cls if needed, return its name
+        """
+        s_class = cls.__name__
+        if s_class in self.tables:
+            return s_class
+        with self.tables_lock:
+            conn = self.connection()
+            conn.execute('CREATE TABLE IF NOT EXISTS "{}" ('
+                         'id TEXT PRIMARY KEY, data TEXT NOT NULL)'
+                         .format(s_class))
+            for attribute in cls.__indexes__:
+                conn.execute('CREATE INDEX IF NOT EXISTS "{0}_{1}" ON "{0}" '
+                             '({2})'.format(s_class, attribute,
+                                            self.column(attribute)))
+            self.tables.add(s_class)
+        return s_class
+
+    @staticmethod
+    def column(attribute: str) -> str:
+        """ Return the SQL expression reading attribute from a row
+        """
+        if attribute == 'id':
+            return 'id'
+        if not attribute.isidentifier():
+            raise AttributeError(attribute)
+        # A literal path, so that expression indexes can be used
+        return "json_extract(data, '$.{}')".format(attribute)
+
+    @staticmethod
+    def value(value):
+        """ Return value as stored in a JSON document
+        """
+        if type(value) is datetime:
+            return value.strftime(TIMESTAMP_FORMAT)
+        return value
+
+    def load(self, cls: type):
+        """ Nothing is cached: only make sure the table exists
+        """
+        start = time.perf_counter()
+        self.table(cls)
+        STATS.setdefault(cls.__name__, {})['load'] = {
+            'objects': 0,
+            'seconds': time.perf_counter() - start,
+        }
+
+    def dump(self, cls: type):
+        """ Nothing to do: every save and remove is already written
+        """
+        self.table(cls)
+
+    @contextmanager
+    def transaction(self):
+        """ Run the block in one SQLite transaction, rolled back if the
+        block raises
+
+        Binds the connection of the current thread.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def save(self, obj: TypeVar('Base')):
+        """ Insert or update the row of an object
+        """
+        table = self.table(obj.__class__)
+        obj.updated_at = datetime.utcnow()
+        self.connection().execute(
+            'INSERT INTO "{}" (id, data) VALUES (?, ?) '
+            'ON CONFLICT(id) DO UPDATE SET data = excluded.data'
+            .format(table), (obj.id, json.dumps(obj.to_json(True))))
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete the row of an object
+        """
+        table = self.table(obj.__class__)
+        self.connection().execute(
+            'DELETE FROM "{}" WHERE id = ?'.format(table), (obj.id,))
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        table = self.table(cls)
+        row = self.connection().execute(
+            'SELECT COUNT(*) FROM "{}"'.format(table)).fetchone()
+        return row[0]
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID
+        """
+        table = self.table(cls)
+        row = self.connection().execute(
+            'SELECT data FROM "{}" WHERE id = ?'.format(table),
+            (id,)).fetchone()
+        if row is None:
+            return None
+        return cls(**json.loads(row[0]))
+
+    def clause(self, c: Condition) -> tuple:
+        """ Return (SQL, params) testing a condition, or None when the
+        value cannot be compared by SQLite
+        """
+        column = self.column(c.attribute)
+        scalar = (str, int, float, bool)
+        if c.op == 'eq':
+            value = self.value(c.value)
+            if value is None or type(value) in scalar:
+                # IS also matches NULL and can use the indexes
+                return "{} IS ?".format(column), [value]
+            return None
+        if c.op == 'in':
+            try:
+                values = [self.value(v) for v in c.value]
+            except TypeError:
+                return None
+            if any(v is not None and type(v) not in scalar for v in values):
+                return None
+            tests = []
+            params = [v for v in values if v is not None]
+            if len(params) > 0:
+                tests.append("{} IN ({})".format(
+                    column, ", ".join("?" * len(params))))
+            if None in values:
+                tests.append("{} IS NULL".format(column))
+            if len(tests) == 0:
+                return "0", []
+            return "(" + " OR ".join(tests) + ")", params
+        if c.op == 'startswith':
+            if type(c.value) is not str:
+                return None
+            if c.value == '':
+                return "typeof({}) = 'text'".format(column), []
+            # A range on the prefix, so that the indexes can be used
+            upper = c.value[:-1] + chr(ord(c.value[-1]) + 1)
+            return ("{0} >= ? AND {0} < ?".format(column),
+                    [c.value, upper])
+        value = self.value(c.value)
+        if type(value) not in scalar:
+            return None
+        sign = {'gt': '>', 'gte': '>=', 'lt': '<', 'lte': '<='}[c.op]
+        return "{} {} ?".format(column, sign), [value]
+
+    def query(self, cls: type, attributes: dict = {}, order_by: str = None,
+              limit: int = None,
+              offset: int = 0) -> Iterator[TypeVar('Base')]:
+        """ Iterate lazily over the objects matching a query
+
+        Conditions, ordering and slicing run in SQLite; rows are only
+        turned into objects as the iterator is consumed.
+        """
+        table = self.table(cls)
+        clauses = []
+        params = []
+        others = []
+        for c in parse(attributes):
+            clause = self.clause(c)
+            if clause is None:
+                # Checked on the objects instead
+                others.append(c)
+            else:
+                clauses.append(clause[0])
+                params.extend(clause[1])
+        query = 'SELECT data FROM "{}"'.format(table)
+        if len(clauses) > 0:
+            query += " WHERE " + " AND ".join(clauses)
+        if order_by is not None:
+            query += " ORDER BY {} {}, rowid".format(
+                self.column(order_by.lstrip('-')),
+                "DESC" if order_by.startswith('-') else "ASC")
+        else:
+            query += " ORDER BY rowid"
+        if len(others) == 0:
+            if limit is not None or offset > 0:
+                query += " LIMIT ? OFFSET ?"
+                params.extend([-1 if limit is None else limit, offset])
+            limit, offset = None, 0
+
+        cursor = self.connection().execute(query, params)
+        objs = (cls(**json.loads(row[0])) for row in cursor)
+        return run(objs, others, None, limit, offset)
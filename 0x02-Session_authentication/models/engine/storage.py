@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+""" Storage module: interface of the engines persisting models.base.Base
+"""
+from typing import TypeVar, List, Iterable, Iterator
+
+
+# Storage metrics: {class name: {operation: {metric: value}}}
+STATS = {}
+
+
+class Storage():
+    """ Storage engine interface
+
+    Methods taking cls receive the Base subclass being stored.
+    """
+
+    def load(self, cls: type):
+        """ (Re)load the objects of cls from persistent storage
+        """
+        raise NotImplementedError()
+
+    def refresh(self, cls: type):
+        """ Bring the objects of cls up to date with persistent storage,
+        if it changed since they were read
+        """
+        pass
+
+    def dump(self, cls: type):
+        """ Write every object of cls to persistent storage
+        """
+        raise NotImplementedError()
+
+    def get(self, cls: type, id: str) -> TypeVar('Base'):
+        """ Return one object by ID, or None
+        """
+        raise NotImplementedError()
+
+    def query(self, cls: type, attributes: dict = {}, order_by: str = None,
+              limit: int = None,
+              offset: int = 0) -> Iterator[TypeVar('Base')]:
+        """ Iterate lazily over the objects matching a query, see
+        models.query for the operators
+        """
+        raise NotImplementedError()
+
+    def search(self, cls: type,
+               attributes: dict = {}) -> List[TypeVar('Base')]:
+        """ Return all objects with matching attributes
+        """
+        return list(self.query(cls, attributes))
+
+    def all(self, cls: type) -> Iterable[TypeVar('Base')]:
+        """ Return all objects
+        """
+        return self.search(cls, {})
+
+    def count(self, cls: type) -> int:
+        """ Count all objects
+        """
+        raise NotImplementedError()
+
+    def save(self, obj: TypeVar('Base')):
+        """ Store an object, refreshing its updated_at
+        """
+        raise NotImplementedError()
+
+    def remove(self, obj: TypeVar('Base')):
+        """ Delete an object
+        """
+        raise NotImplementedError()
+
+    def transaction(self):
+        """ Return a context manager grouping the saves and removes of its
+        block into one atomic write, undone if the block raises
+
+        Nested blocks join the outermost one. The value bound by `as` is
+        engine specific.
+        """
+        raise NotImplementedError()
+
+    def flush(self):
+        """ Write any mutation still buffered by the engine
+        """
+        pass
+
+    def stats(self, cls: type) -> dict:
+        """ Return the storage metrics of cls
+        """
+        return STATS.get(cls.__name__, {})
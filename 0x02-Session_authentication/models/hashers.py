@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+""" Hashers module: registry of password hashing algorithms
+
+Hashes describe themselves as <algorithm>$<parameters>$<salt>$<hash>:
+    pbkdf2_sha256$600000$<salt>$<hash>
+    scrypt$16384$8$1$<salt>$<hash>
+    bcrypt$$2b$12$<salt and hash>
+A bare 64 character hex digest is an unsalted SHA-256 hash, the format
+used before the registry existed.
+
+New hashes stay SHA-256 digests unless PASSWORD_HASHER names another
+algorithm; PBKDF2_ITERATIONS, SCRYPT_N and BCRYPT_ROUNDS set their cost.
+Setting it is a latency trade-off chosen per deployment: every Basic
+auth request missing the credential cache pays a verify, e.g. about
+290 ms with PBKDF2 at 600000 iterations (see benchmarks.bench_hashers),
+and users are hashed again with it as they log in.
+"""
+from os import getenv
+import base64
+import hashlib
+import hmac
+import os
+
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+
+HASHERS = {}
+
+
+def b64encode(data: bytes) -> str:
+    """ Encode bytes as unpadded base64
+    """
+    return base64.b64encode(data).decode('ascii').rstrip('=')
+
+
+def b64decode(data: str) -> bytes:
+    """ Decode unpadded base64
+    """
+    return base64.b64decode(data + '=' * (-len(data) % 4))
+
+
+def env_int(name: str, default: int) -> int:
+    """ Return the integer value of an environment variable
+    """
+    try:
+        return int(getenv(name, default))
+    except ValueError:
+        return default
+
+
+class Hasher():
+    """ Password hashing algorithm
+
+    Subclasses set algorithm and implement encode and verify.
+    """
+
+    algorithm = None
+
+    def encode(self, password: str) -> str:
+        """ Return the self-describing hash of a password, freshly salted
+        """
+        raise NotImplementedError()
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """ Check a password against a hash of this algorithm
+        """
+        raise NotImplementedError()
+
+    def must_update(self, encoded: str) -> bool:
+        """ Check if a hash of this algorithm has other parameters than
+        new ones
+        """
+        return False
+
+
+class SHA256Hasher(Hasher):
+    """ Legacy unsalted SHA-256 hex digests
+    """
+
+    algorithm = 'sha256'
+
+    @staticmethod
+    def identify(encoded: str) -> bool:
+        """ Check if encoded is a legacy hex digest
+        """
+        return len(encoded) == 64 and all(
+            c in '0123456789abcdef' for c in encoded)
+
+    def encode(self, password: str) -> str:
+        """ Return the hex digest of a password
+        """
+        return hashlib.sha256(password.encode()).hexdigest().lower()
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """ Check a password against its hex digest
+        """
+        return hmac.compare_digest(self.encode(password), encoded)
+
+
+class PBKDF2Hasher(Hasher):
+    """ PBKDF2-HMAC-SHA256
+    """
+
+    algorithm = 'pbkdf2_sha256'
+
+    def __init__(self, iterations: int = None):
+        """ Initialize the hasher with its number of iterations
+        """
+        if iterations is None:
+            iterations = env_int('PBKDF2_ITERATIONS', 600000)
+        self.iterations = iterations
+
+    def digest(self, password: str, salt: bytes, iterations: int) -> bytes:
+        """ Return the raw derived key
+        """
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt,
+                                   iterations)
+
+    def encode(self, password: str) -> str:
+        """ Return pbkdf2_sha256$<iterations>$<salt>$<hash>
+        """
+        salt = os.urandom(16)
+        return '$'.join([self.algorithm, str(self.iterations),
+                         b64encode(salt), b64encode(self.digest(
+                             password, salt, self.iterations))])
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """ Check a password against a PBKDF2 hash
+        """
+        _, iterations, salt, expected = encoded.split('$', 3)
+        actual = self.digest(password, b64decode(salt), int(iterations))
+        return hmac.compare_digest(b64encode(actual), expected)
+
+    def params(self, encoded: str) -> tuple:
+        """ Return (iterations,)
+        """
+        return (int(encoded.split('$', 2)[1]),)
+
+    def must_update(self, encoded: str) -> bool:
+        """ Check if the iterations differ from new hashes
+        """
+        return self.params(encoded) != (self.iterations,)
+
+
+class ScryptHasher(Hasher):
+    """ scrypt, memory-hard
+    """
+
+    algorithm = 'scrypt'
+
+    def __init__(self, n: int = None, r: int = 8, p: int = 1):
+        """ Initialize the hasher with its cost parameters
+        """
+        if n is None:
+            n = env_int('SCRYPT_N', 1 << 14)
+        self.n, self.r, self.p = n, r, p
+
+    def digest(self, password: str, salt: bytes, n: int, r: int,
+               p: int) -> bytes:
+        """ Return the raw derived key
+        """
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r + (1 << 20), dklen=32)
+
+    def encode(self, password: str) -> str:
+        """ Return scrypt$<n>$<r>$<p>$<salt>$<hash>
+        """
+        salt = os.urandom(16)
+        return '$'.join([self.algorithm, str(self.n), str(self.r),
+                         str(self.p), b64encode(salt), b64encode(
+                             self.digest(password, salt, self.n, self.r,
+                                         self.p))])
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """ Check a password against an scrypt hash
+        """
+        _, n, r, p, salt, expected = encoded.split('$', 5)
+        actual = self.digest(password, b64decode(salt), int(n), int(r),
+                             int(p))
+        return hmac.compare_digest(b64encode(actual), expected)
+
+    def params(self, encoded: str) -> tuple:
+        """ Return (n, r, p)
+        """
+        return tuple(int(v) for v in encoded.split('$', 4)[1:4])
+
+    def must_update(self, encoded: str) -> bool:
+        """ Check if the cost differs from new hashes
+        """
+        return self.params(encoded) != (self.n, self.r, self.p)
+
+
+class BcryptHasher(Hasher):
+    """ bcrypt, available when the bcrypt package is installed
+    """
+
+    algorithm = 'bcrypt'
+
+    def __init__(self, rounds: int = None):
+        """ Initialize the hasher with its cost factor
+        """
+        if rounds is None:
+            rounds = env_int('BCRYPT_ROUNDS', 12)
+        self.rounds = rounds
+
+    def encode(self, password: str) -> str:
+        """ Return bcrypt$<bcrypt hash>
+        """
+        hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt(self.rounds))
+        return self.algorithm + '$' + hashed.decode('ascii')
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """ Check a password against a bcrypt hash
+        """
+        hashed = encoded.split('$', 1)[1].encode('ascii')
+        return bcrypt.checkpw(password.encode(), hashed)
+
+    def params(self, encoded: str) -> tuple:
+        """ Return (rounds,)
+        """
+        return (int(encoded.split('$')[3]),)
+
+    def must_update(self, encoded: str) -> bool:
+        """ Check if the cost factor differs from new hashes
+        """
+        return self.params(encoded) != (self.rounds,)
+
+
+def register(hasher: Hasher):
+    """ Make a hasher available to encode and verify
+    """
+    HASHERS[hasher.algorithm] = hasher
+
+
+register(SHA256Hasher())
+register(PBKDF2Hasher())
+if hasattr(hashlib, 'scrypt'):
+    register(ScryptHasher())
+if bcrypt is not None:
+    register(BcryptHasher())
+
+
+def identify(encoded: str) -> Hasher:
+    """ Return the hasher of a hash, or None if it is not registered
+    """
+    if SHA256Hasher.identify(encoded):
+        return HASHERS.get(SHA256Hasher.algorithm)
+    return HASHERS.get(encoded.split('$', 1)[0])
+
+
+def default_hasher() -> Hasher:
+    """ Return the hasher of new hashes, set by PASSWORD_HASHER
+
+    SHA-256 when unset; PBKDF2 when it names an unavailable algorithm.
+    """
+    algorithm = getenv('PASSWORD_HASHER')
+    if not algorithm:
+        return HASHERS[SHA256Hasher.algorithm]
+    return HASHERS.get(algorithm, HASHERS[PBKDF2Hasher.algorithm])
+
+
+def make_password(password: str) -> str:
+    """ Return the hash of a password with the default hasher
+    """
+    return default_hasher().encode(password)
+
+
+def check_password(password: str, encoded: str) -> bool:
+    """ Check a password against a hash of any registered algorithm
+    """
+    hasher = identify(encoded)
+    if hasher is None:
+        return False
+    try:
+        return hasher.verify(password, encoded)
+    except ValueError:
+        # Malformed hash
+        return False
+
+
+def needs_rehash(encoded: str) -> bool:
+    """ Check if a hash should be replaced by one of the default hasher
+    """
+    default = default_hasher()
+    if default.algorithm == SHA256Hasher.algorithm:
+        # Stronger hashes are never downgraded to legacy digests
+        return False
+    hasher = identify(encoded)
+    if hasher is not default:
+        return True
+    try:
+        return hasher.must_update(encoded)
+    except (IndexError, ValueError):
+        return True
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+""" Loader module: incremental parsing of .db_<Class>.json files
+"""
+from typing import Iterator, Tuple
+import codecs
+import json
+import mmap
+import os
+
+
+CHUNK_SIZE = 1 << 20
+
+try:
+    import resource
+
+    def peak_rss_kb() -> int:
+        """ Return the peak resident set size of the process in KB
+        """
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+except ImportError:
+    def peak_rss_kb() -> int:
+        """ Peak RSS is not available on this platform
+        """
+        return None
+
+
+class _Reader():
+    """ Text window over a memory-mapped UTF-8 file
+    """
+
+    def __init__(self, mm: mmap.mmap, chunk_size: int):
+        """ Initialize a reader at the start of the map
+        """
+        self.mm = mm
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+
+    def more(self) -> bool:
+        """ Decode the next chunk of the map into the buffer
+        """
+        if self.offset >= len(self.mm):
+            return False
+        chunk = self.mm[self.offset:self.offset + self.chunk_size]
+        self.offset += len(chunk)
+        final = self.offset >= len(self.mm)
+        # Drop what was already consumed so the window stays small
+        self.buf = self.buf[self.pos:] + self.utf8.decode(chunk, final)
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """ Return the next non-whitespace character, or '' at EOF
+        """
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return ''
+
+    def expect(self, char: str):
+        """ Consume char or raise a ValueError
+        """
+        if self.peek() != char:
+            raise ValueError("Expecting '{}' at offset {}"
+                             .format(char, self.offset))
+        self.pos += 1
+
+    def value(self, decoder: json.JSONDecoder):
+        """ Decode the next JSON value, pulling chunks as needed
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = decoder.raw_decode(self.buf, self.pos)
+            except ValueError:
+                if self.more():
+                    continue
+                raise
+            # A scalar ending exactly at the window may be truncated
+            if end == len(self.buf) and self.more():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_items(file_path: str,
+               chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, dict]]:
+    """ Yield the (key, value) pairs of the top-level JSON object stored
+    in file_path one at a time, without reading the whole file
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            reader = _Reader(mm, chunk_size)
+            reader.expect('{')
+            if reader.peek() == '}':
+                return
+            while True:
+                key = reader.value(decoder)
+                reader.expect(':')
+                yield key, reader.value(decoder)
+                if reader.peek() == '}':
+                    return
+                reader.expect(',')
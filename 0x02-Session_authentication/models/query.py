@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+""" Query module: conditions, ordering and slicing for Base.query
+
+Keys of a query are attribute names, optionally followed by an operator:
+    {'email': 'bob@hbtn.io'}                 equality
+    {'email__in': ['bob@hbtn.io', ...]}      membership
+    {'email__startswith': 'bob'}             string prefix
+    {'created_at__gte': t, 'created_at__lt': u}  range (gt, gte, lt, lte)
+"""
+from typing import TypeVar, Iterable, Iterator, List
+import heapq
+import itertools
+
+
+OPERATORS = ('in', 'startswith', 'gt', 'gte', 'lt', 'lte')
+
+
+class Condition():
+    """ One attribute test of a query
+    """
+
+    def __init__(self, key: str, value):
+        """ Initialize a Condition from a query key and its value
+        """
+        attribute, sep, op = key.rpartition('__')
+        if sep == '' or attribute == '' or op not in OPERATORS:
+            attribute, op = key, 'eq'
+        self.attribute = attribute
+        self.op = op
+        self.value = value
+
+    def match(self, obj: TypeVar('Base')) -> bool:
+        """ Return True if obj satisfies the condition
+        """
+        actual = getattr(obj, self.attribute)
+        if self.op == 'eq':
+            return actual == self.value
+        if self.op == 'in':
+            return actual in self.value
+        if self.op == 'startswith':
+            return type(actual) is str and actual.startswith(self.value)
+        if actual is None:
+            return False
+        if self.op == 'gt':
+            return actual > self.value
+        if self.op == 'gte':
+            return actual >= self.value
+        if self.op == 'lt':
+            return actual < self.value
+        return actual <= self.value
+
+
+def parse(attributes: dict) -> List[Condition]:
+    """ Return the conditions of a query
+    """
+    return [Condition(k, v) for k, v in attributes.items()]
+
+
+def sort_key(attribute: str):
+    """ Return a key function ordering objects by attribute, None first
+    """
+    def _key(obj):
+        value = getattr(obj, attribute, None)
+        return (value is not None, value)
+    return _key
+
+
+def run(objs: Iterable[TypeVar('Base')], conditions: List[Condition],
+        order_by: str = None, limit: int = None,
+        offset: int = 0) -> Iterator[TypeVar('Base')]:
+    """ Filter, order and slice candidate objects lazily
+
+    order_by is an attribute name, prefixed by '-' for descending order.
+    Without order_by the candidates are never materialized; with a limit
+    only the offset + limit first ones are kept while scanning.
+    """
+    matches = (obj for obj in objs
+               if all(c.match(obj) for c in conditions))
+    if order_by is not None:
+        reverse = order_by.startswith('-')
+        key = sort_key(order_by.lstrip('-'))
+        if limit is not None:
+            pick = heapq.nlargest if reverse else heapq.nsmallest
+            matches = pick(offset + limit, matches, key=key)
+        else:
+            matches = sorted(matches, key=key, reverse=reverse)
+    stop = None if limit is None else offset + limit
+    return itertools.islice(matches, offset, stop)
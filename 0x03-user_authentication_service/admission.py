@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Admission module: concurrency limit for CPU-heavy routes
+"""
+from flask import jsonify
+from functools import wraps
+from os import cpu_count, getenv
+import threading
+import time
+
+
+class AdmissionController:
+    """Limit on the requests of a route running at once
+
+    Up to max_concurrent requests run; up to max_queue more wait, each
+    for at most queue_timeout seconds. Any other request is shed at once
+    with a 503 and a Retry-After header, so a storm on the route cannot
+    take every worker thread from the cheap routes.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int,
+                 queue_timeout: float = 2.0, retry_after: int = 1):
+        """Initialize an idle AdmissionController
+
+        Args:
+            max_concurrent (int): Requests running at once
+            max_queue (int): Requests waiting for a slot at once
+            queue_timeout (float): Seconds a request may wait
+            retry_after (int): Seconds sent in Retry-After when shedding
+        """
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.condition = threading.Condition()
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.queued = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def acquire(self) -> bool:
+        """Take a slot, waiting in the queue if there is room
+
+        Returns:
+            bool: False if the request must be shed
+        """
+        with self.condition:
+            if self.active < self.max_concurrent and self.waiting == 0:
+                self.active += 1
+                self.admitted += 1
+                return True
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+            start = time.monotonic()
+            admitted = self.condition.wait_for(
+                lambda: self.active < self.max_concurrent,
+                self.queue_timeout)
+            self.waiting -= 1
+            waited = time.monotonic() - start
+            self.queued += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if not admitted:
+                self.shed += 1
+                return False
+            self.active += 1
+            self.admitted += 1
+            return True
+
+    def release(self):
+        """Give a slot back to the next waiting request"""
+        with self.condition:
+            self.active -= 1
+            self.condition.notify()
+
+    def limit(self, view):
+        """Decorate a view so that it runs under admission control
+
+        Args:
+            view (function): Flask view
+
+        Returns:
+            function: View answering 503 when the request is shed
+        """
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not self.acquire():
+                response = jsonify({"message": "service overloaded"})
+                response.headers['Retry-After'] = str(self.retry_after)
+                return response, 503
+            try:
+                return view(*args, **kwargs)
+            finally:
+                self.release()
+        return wrapper
+
+    def stats(self) -> dict:
+        """Return the admission metrics
+
+        Returns:
+            dict: Gauges, counters and queue wait times
+        """
+        with self.condition:
+            return {
+                'active': self.active,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'queued': self.queued,
+                'queue_wait_seconds': self.wait_seconds,
+                'queue_wait_max_seconds': self.max_wait_seconds,
+            }
+
+
+def from_env(prefix: str) -> AdmissionController:
+    """Create an AdmissionController configured by <prefix>_MAX_CONCURRENT
+    (default: number of cores), <prefix>_MAX_QUEUE (default: 4 times as
+    many), <prefix>_QUEUE_TIMEOUT and <prefix>_RETRY_AFTER
+
+    Args:
+        prefix (str): Prefix of the environment variables
+
+    Returns:
+        AdmissionController: New controller
+    """
+    try:
+        max_concurrent = int(getenv(prefix + '_MAX_CONCURRENT', 0))
+        max_queue = int(getenv(prefix + '_MAX_QUEUE', -1))
+        queue_timeout = float(getenv(prefix + '_QUEUE_TIMEOUT', 2.0))
+        retry_after = int(getenv(prefix + '_RETRY_AFTER', 1))
+    except ValueError:
+        max_concurrent, max_queue, queue_timeout, retry_after = 0, -1, 2.0, 1
+    if max_concurrent <= 0:
+        max_concurrent = cpu_count() or 1
+    if max_queue < 0:
+        max_queue = 4 * max_concurrent
+    return AdmissionController(max_concurrent, max_queue, queue_timeout,
+                               retry_after)
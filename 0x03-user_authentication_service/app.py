@@ -3,10 +3,25 @@
 """
 from flask import Flask, jsonify, request, abort, redirect
 
+from admission import from_env
 from auth import Auth
+from hashing import HashingUnavailable
 
 app = Flask(__name__)
 AUTH = Auth()
+# Concurrency limit of the password checks of POST /sessions
+LOGIN_ADMISSION = from_env('LOGIN')
+
+
+@app.errorhandler(HashingUnavailable)
+def hashing_unavailable(error) -> str:
+    """Password hashing is overloaded
+    Return:
+        - 503 with an error payload and a Retry-After header
+    """
+    response = jsonify({"message": "service overloaded"})
+    response.headers['Retry-After'] = str(LOGIN_ADMISSION.retry_after)
+    return response, 503
 
 
 @app.route("/", methods=["GET"], strict_slashes=False)
@@ -35,6 +50,7 @@ def users() -> str:
 
 
 @app.route("/sessions", methods=["POST"], strict_slashes=False)
+@LOGIN_ADMISSION.limit
 def login() -> str:
     """POST /sessions
     Return:
@@ -51,6 +67,15 @@ def login() -> str:
     return response
 
 
+@app.route("/metrics", methods=["GET"], strict_slashes=False)
+def metrics() -> str:
+    """GET /metrics
+    Return:
+        - The admission control metrics of the login route.
+    """
+    return jsonify({"login": LOGIN_ADMISSION.stats()})
+
+
 @app.route("/sessions", methods=["DELETE"], strict_slashes=False)
 def logout() -> str:
     """DELETE /sessions
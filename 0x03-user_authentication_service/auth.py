@@ -3,12 +3,16 @@
 Auth module
 """
 from db import DB
+from os import getenv
 from uuid import uuid4
 from user import User
-from bcrypt import hashpw, gensalt, checkpw
+from hashing import from_env, HashingUnavailable
 from typing import TypeVar
 from sqlalchemy.orm.exc import NoResultFound
 
+# bcrypt runs in worker processes, not on the request threads
+HASH_EXECUTOR = from_env()
+
 
 def _hash_password(password: str) -> str:
     """Hash a password for a user
@@ -18,8 +22,11 @@ def _hash_password(password: str) -> str:
 
     Returns:
         str: Hashed password
+
+    Raises:
+        HashingUnavailable: If the hashing executor is overloaded
     """
-    return hashpw(password.encode('utf-8'), gensalt())
+    return HASH_EXECUTOR.hash(password.encode('utf-8'))
 
 
 def _generate_uuid() -> str:
@@ -36,8 +43,12 @@ class Auth:
     """
 
     def __init__(self):
-        """Initialize the Auth class"""
-        self._db = DB()
+        """Initialize the Auth class
+
+        The users table is emptied at start unless DB_RESET is 0, e.g. to
+        serve users loaded by import_users.py
+        """
+        self._db = DB(reset=getenv('DB_RESET', '1') != '0')
 
     def register_user(self, email: str, password: str) -> User:
         """Register a user
@@ -71,7 +82,18 @@ class Auth:
             user = self._db.find_user_by(email=email)
         except NoResultFound:
             return False
-        return checkpw(password.encode('utf-8'), user.hashed_password)
+        if not HASH_EXECUTOR.check(password.encode('utf-8'),
+                                   user.hashed_password):
+            return False
+        if HASH_EXECUTOR.needs_rehash(user.hashed_password):
+            # Bring the hash to the current cost while the password is
+            # known; the login succeeds even if this cannot be done now
+            try:
+                self._db.update_user(
+                    user.id, hashed_password=_hash_password(password))
+            except HashingUnavailable:
+                pass
+        return True
 
     def create_session(self, email: str) -> str:
         """Create a new session for a user
@@ -87,6 +109,7 @@ class Auth:
             session_id = _generate_uuid()
             # Update the user's session ID in the database
             self._db.update_user(user.id, session_id=session_id)
+            return session_id
         except NoResultFound:
             return
 
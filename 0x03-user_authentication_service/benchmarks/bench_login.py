@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+""" Load benchmark of the password checks done at login
+
+Request threads check passwords through a HashExecutor, inline and with
+1 up to the number of cores worker processes, and the logins per second
+are reported. With the pool, the request process itself stays free to
+serve other requests while hashes are computed.
+
+Usage (from the project root):
+    python3 -m benchmarks.bench_login [seconds_per_run] [bcrypt_rounds]
+"""
+from os import cpu_count
+import sys
+import threading
+import time
+
+from hashing import HashExecutor, HashingUnavailable, hash_password
+
+
+def load(executor: HashExecutor, hashed: bytes, threads: int,
+         seconds: float) -> tuple:
+    """ Check passwords from threads threads for seconds seconds
+
+    Returns:
+        tuple: (logins per second, calls rejected)
+    """
+    done = [0] * threads
+    rejected = [0] * threads
+    deadline = time.monotonic() + seconds
+
+    def worker(i: int):
+        """ Log in until the deadline """
+        while time.monotonic() < deadline:
+            try:
+                if executor.check(b'H0lbertonSchool98!', hashed):
+                    done[i] += 1
+            except HashingUnavailable:
+                rejected[i] += 1
+
+    start = time.monotonic()
+    workers = [threading.Thread(target=worker, args=(i,))
+               for i in range(threads)]
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return sum(done) / (time.monotonic() - start), sum(rejected)
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    cores = cpu_count() or 1
+    hashed = hash_password(b'H0lbertonSchool98!', rounds)
+    threads = 4 * cores
+
+    print("{} cores, {} request threads, bcrypt rounds {}".format(
+        cores, threads, rounds))
+    print("{:<8} {:>10} {:>10}".format('workers', 'logins/s', 'rejected'))
+    for workers in [0] + list(range(1, cores + 1)):
+        executor = HashExecutor(workers, queue_timeout=5)
+        # Start the processes before measuring
+        executor.check(b'', hashed)
+        rate, rejected = load(executor, hashed, threads, seconds)
+        executor.shutdown()
+        print("{:<8} {:>10.1f} {:>10}".format(
+            workers or 'inline', rate, rejected))
@@ -8,7 +8,7 @@ from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.exc import NoResultFound
-from typing import TypeVar
+from typing import TypeVar, List
 from user import Base, User  # Assuming there is an import for the User model
 
 DATA = ['id', 'email', 'hashed_password', 'session_id', 'reset_token']
@@ -17,13 +17,18 @@ DATA = ['id', 'email', 'hashed_password', 'session_id', 'reset_token']
 class DB:
     """Database class for managing user data"""
 
-    def __init__(self):
-        """Initialize the DB class"""
+    def __init__(self, reset: bool = True):
+        """Initialize the DB class
+
+        Args:
+            reset (bool): Start from empty tables, True by default
+        """
         # Create a SQLite database engine
         self._engine = create_engine("sqlite:///a.db", echo=False)
 
         # Drop and create all tables defined in the Base class
-        Base.metadata.drop_all(self._engine)
+        if reset:
+            Base.metadata.drop_all(self._engine)
         Base.metadata.create_all(self._engine)
 
         # Initialize the session to None
@@ -59,6 +64,44 @@ class DB:
         session.commit()
         return user
 
+    def existing_emails(self, emails: List[str]) -> set:
+        """Find which emails are already registered
+
+        Args:
+            emails (list): Emails to look up
+
+        Returns:
+            set: Emails of the list registered in the database
+        """
+        known = set()
+        # Small enough IN lists for any SQLite version
+        for i in range(0, len(emails), 500):
+            known.update(email for email, in self._session.query(
+                User.email).filter(User.email.in_(emails[i:i + 500])))
+        return known
+
+    def add_users(self, users: List[dict]) -> int:
+        """Add many users to the database with a single commit
+
+        Args:
+            users (list): Dicts with the email and hashed_password of
+                each user; emails already registered are skipped
+
+        Returns:
+            int: Number of users added
+        """
+        session = self._session
+        known = self.existing_emails([u['email'] for u in users])
+        new_users = []
+        for u in users:
+            if u['email'] not in known:
+                known.add(u['email'])
+                new_users.append({'email': u['email'],
+                                  'hashed_password': u['hashed_password']})
+        session.bulk_insert_mappings(User, new_users)
+        session.commit()
+        return len(new_users)
+
     def find_user_by(self, **kwargs) -> User:
         """Find user by specified arguments
 
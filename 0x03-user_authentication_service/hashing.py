@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+"""
+Hashing module: bcrypt work offloaded to a pool of processes
+"""
+from bcrypt import hashpw, gensalt, checkpw
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from os import cpu_count, getenv
+import math
+import threading
+import time
+
+# bcrypt accepts costs from 4 to 31; above 16 a hash takes many seconds
+MIN_ROUNDS = 4
+MAX_ROUNDS = 16
+
+
+class HashingUnavailable(Exception):
+    """Raised when a hash cannot be computed in time: too many calls are
+    already waiting, the call took longer than its timeout, or a worker
+    process died
+    """
+    pass
+
+
+def hash_password(password: bytes, rounds: int = 12) -> bytes:
+    """Hash a password with a new salt
+
+    Args:
+        password (bytes): Password to hash
+        rounds (int): bcrypt cost factor
+
+    Returns:
+        bytes: Salted hash
+    """
+    return hashpw(password, gensalt(rounds))
+
+
+def check_password(password: bytes, hashed_password: bytes) -> bool:
+    """Check a password against its hash
+
+    Args:
+        password (bytes): Password to check
+        hashed_password (bytes): Salted hash
+
+    Returns:
+        bool: True if the password matches
+    """
+    return checkpw(password, hashed_password)
+
+
+def hash_rounds(hashed_password) -> int:
+    """Read the cost factor of a bcrypt hash, e.g. 12 in $2b$12$...
+
+    Args:
+        hashed_password (bytes or str): Salted hash
+
+    Returns:
+        int: Cost factor, or None if the hash is not a bcrypt hash
+    """
+    if isinstance(hashed_password, str):
+        hashed_password = hashed_password.encode('utf-8')
+    parts = hashed_password.split(b'$')
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+def calibrate(target: float, probe_rounds: int = 6) -> int:
+    """Pick the bcrypt cost whose hashes take about target seconds here
+
+    Each extra round doubles the work, so the cost is extrapolated from
+    the fastest of a few probe hashes at a low cost.
+
+    Args:
+        target (float): Wanted hash and verify latency, in seconds
+        probe_rounds (int): Cost of the probe hashes
+
+    Returns:
+        int: Cost factor between MIN_ROUNDS and MAX_ROUNDS
+    """
+    salt = gensalt(probe_rounds)
+    elapsed = []
+    for _ in range(3):
+        start = time.perf_counter()
+        hashpw(b'calibration', salt)
+        elapsed.append(time.perf_counter() - start)
+    rounds = probe_rounds + math.floor(math.log2(target / min(elapsed)))
+    return max(MIN_ROUNDS, min(MAX_ROUNDS, rounds))
+
+
+class HashExecutor:
+    """Pool of processes computing bcrypt hashes off the request threads
+
+    At most max_pending calls are queued or running at once; a call
+    waits up to queue_timeout seconds for a slot, then up to timeout
+    seconds for its result, and raises HashingUnavailable otherwise.
+    With 0 workers, hashes are computed inline.
+    """
+
+    def __init__(self, workers: int = None, max_pending: int = None,
+                 queue_timeout: float = 1.0, timeout: float = 10.0,
+                 rounds: int = None, target: float = 0.25):
+        """Initialize the executor; processes start on first use
+
+        Args:
+            workers (int): Number of processes, the number of cores by
+                default
+            max_pending (int): Calls queued or running at once, 4 per
+                process by default
+            queue_timeout (float): Seconds to wait for a slot
+            timeout (float): Seconds to wait for a result
+            rounds (int): Cost of new hashes, calibrated by default
+            target (float): Hash latency aimed at by the calibration
+        """
+        # Calibrated once, before any request loads the CPU
+        self.rounds = rounds or calibrate(target)
+        self.target = target
+        if workers is None:
+            workers = cpu_count() or 1
+        self.workers = workers
+        self.max_pending = max_pending or 4 * max(workers, 1)
+        self.queue_timeout = queue_timeout
+        self.timeout = timeout
+        self.slots = threading.BoundedSemaphore(self.max_pending)
+        self.pool = None
+        self.pool_lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        """Return the process pool, starting it if needed"""
+        if self.pool is None:
+            with self.pool_lock:
+                if self.pool is None:
+                    self.pool = ProcessPoolExecutor(self.workers)
+        return self.pool
+
+    def _discard(self, pool: ProcessPoolExecutor):
+        """Drop a broken pool, so that the next call starts a new one"""
+        with self.pool_lock:
+            if self.pool is pool:
+                self.pool = None
+        pool.shutdown(wait=False)
+
+    def run(self, fn, *args):
+        """Run fn(*args) in the pool and return its result
+
+        Raises:
+            HashingUnavailable: If no slot frees up or no result comes
+                in time
+        """
+        if self.workers <= 0:
+            return fn(*args)
+        if not self.slots.acquire(timeout=self.queue_timeout):
+            raise HashingUnavailable("hashing queue is full")
+        pool = self._pool()
+        try:
+            future = pool.submit(fn, *args)
+        except BrokenProcessPool:
+            self.slots.release()
+            self._discard(pool)
+            raise HashingUnavailable("hashing process died")
+        except BaseException:
+            self.slots.release()
+            raise
+        # The slot is held until the work is really done, even when the
+        # caller gives up waiting
+        future.add_done_callback(lambda f: self.slots.release())
+        try:
+            return future.result(self.timeout)
+        except TimeoutError:
+            future.cancel()
+            raise HashingUnavailable("hashing timed out")
+        except BrokenProcessPool:
+            # A worker was killed: every later call would fail too
+            self._discard(pool)
+            raise HashingUnavailable("hashing process died")
+
+    def hash(self, password: bytes, rounds: int = None) -> bytes:
+        """Hash a password with a new salt in the pool"""
+        return self.run(hash_password, password, rounds or self.rounds)
+
+    def needs_rehash(self, hashed_password) -> bool:
+        """Check if a hash was made with a lower cost than new ones
+
+        Stronger hashes are kept, so processes calibrated to different
+        costs never rehash the same user back and forth.
+        """
+        rounds = hash_rounds(hashed_password)
+        return rounds is None or rounds < self.rounds
+
+    def check(self, password: bytes, hashed_password: bytes) -> bool:
+        """Check a password against its hash in the pool"""
+        return self.run(check_password, password, hashed_password)
+
+    def shutdown(self):
+        """Stop the processes of the pool"""
+        with self.pool_lock:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
+
+
+def from_env() -> HashExecutor:
+    """Create a HashExecutor configured by HASH_WORKERS,
+    HASH_MAX_PENDING, HASH_QUEUE_TIMEOUT, HASH_TIMEOUT, and BCRYPT_ROUNDS
+    or BCRYPT_TARGET_SECONDS
+
+    Returns:
+        HashExecutor: New executor
+    """
+    try:
+        workers = getenv('HASH_WORKERS')
+        workers = int(workers) if workers else None
+        max_pending = int(getenv('HASH_MAX_PENDING', 0)) or None
+        queue_timeout = float(getenv('HASH_QUEUE_TIMEOUT', 1.0))
+        timeout = float(getenv('HASH_TIMEOUT', 10.0))
+    except ValueError:
+        workers, max_pending, queue_timeout, timeout = None, None, 1.0, 10.0
+    try:
+        # A fixed cost wins over the calibration
+        rounds = int(getenv('BCRYPT_ROUNDS', 0)) or None
+        target = float(getenv('BCRYPT_TARGET_SECONDS', 0.25))
+    except ValueError:
+        rounds, target = None, 0.25
+    return HashExecutor(workers, max_pending, queue_timeout, timeout,
+                        rounds, target)
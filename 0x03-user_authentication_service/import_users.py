@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Bulk import of users into the authentication service database
+
+Streams users from a CSV file (with a header) or an NDJSON file, one
+object per line, with the fields email and password. Passwords are
+hashed with bcrypt in parallel on every core, and each batch of users is
+inserted with a single commit.
+
+The number of input records done is kept in <input>.progress after each
+batch, so an interrupted import resumes where it stopped; emails
+already registered are skipped before hashing, so replaying a batch is
+cheap and harmless.
+
+The service empties the users table when it starts: run it with
+DB_RESET=0 to keep the imported users.
+
+Usage (from the project root):
+    python3 import_users.py users.csv [--batch-size N] [--workers N]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from os import cpu_count, path, remove, replace
+from typing import Iterator
+import argparse
+import csv
+import itertools
+import json
+import sys
+import time
+
+from db import DB
+from hashing import from_env, hash_password
+
+
+def read_records(file_path: str, file_format: str = None) -> Iterator[dict]:
+    """Iterate over the records of a CSV or NDJSON file
+
+    Args:
+        file_path (str): Input file
+        file_format (str): csv or ndjson, from the extension by default
+
+    Returns:
+        Iterator[dict]: Records of the file
+    """
+    if file_format is None:
+        file_format = 'csv' if file_path.endswith('.csv') else 'ndjson'
+    with open(file_path, newline='', encoding='utf-8') as f:
+        if file_format == 'csv':
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def load_progress(state_path: str) -> int:
+    """Read the number of records already imported
+
+    Args:
+        state_path (str): Progress file
+
+    Returns:
+        int: Records done by previous runs
+    """
+    if not path.exists(state_path):
+        return 0
+    with open(state_path) as f:
+        return json.load(f)['records']
+
+
+def save_progress(state_path: str, records: int) -> None:
+    """Record the number of records imported, atomically
+
+    Args:
+        state_path (str): Progress file
+        records (int): Records done
+    """
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'records': records}, f)
+    replace(tmp_path, state_path)
+
+
+def import_batch(db: DB, pool: ProcessPoolExecutor, records: list,
+                 rounds: int, workers: int) -> int:
+    """Hash the passwords of the new users of a batch in parallel and
+    insert them with one commit
+
+    Args:
+        db (DB): Target database
+        pool (ProcessPoolExecutor): Hashing processes
+        records (list): Input records
+        rounds (int): bcrypt cost factor
+        workers (int): Number of hashing processes
+
+    Returns:
+        int: Number of users inserted
+    """
+    valid = {}
+    for record in records:
+        if record.get('email') and record.get('password'):
+            valid.setdefault(record['email'], record)
+    # Only new users are worth a bcrypt hash
+    for email in db.existing_emails(list(valid)):
+        del valid[email]
+    valid = list(valid.values())
+    chunksize = max(1, len(valid) // (4 * workers))
+    hashes = pool.map(partial(hash_password, rounds=rounds),
+                      [r['password'].encode('utf-8') for r in valid],
+                      chunksize=chunksize)
+    return db.add_users([{'email': r['email'], 'hashed_password': hashed}
+                         for r, hashed in zip(valid, hashes)])
+
+
+def main(argv: list = None) -> None:
+    """Run the import command
+
+    Args:
+        argv (list): Command line arguments, sys.argv by default
+    """
+    parser = argparse.ArgumentParser(description="Bulk import users")
+    parser.add_argument('input', help="CSV or NDJSON file")
+    parser.add_argument('--format', choices=('csv', 'ndjson'),
+                        help="input format, from the extension by default")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--workers', type=int, default=cpu_count() or 1)
+    parser.add_argument('--restart', action='store_true',
+                        help="ignore the progress of a previous run")
+    args = parser.parse_args(argv)
+
+    state_path = args.input + '.progress'
+    done = 0 if args.restart else load_progress(state_path)
+    # Same cost as the hashes made by the service
+    rounds = from_env().rounds
+    db = DB(reset=False)
+    records = itertools.islice(read_records(args.input, args.format),
+                               done, None)
+    imported = skipped = 0
+    start = time.monotonic()
+    if done > 0:
+        print("resuming after {} records".format(done), file=sys.stderr)
+    with ProcessPoolExecutor(args.workers) as pool:
+        while True:
+            batch = list(itertools.islice(records, args.batch_size))
+            if len(batch) == 0:
+                break
+            count = import_batch(db, pool, batch, rounds, args.workers)
+            imported += count
+            skipped += len(batch) - count
+            done += len(batch)
+            save_progress(state_path, done)
+            elapsed = time.monotonic() - start
+            print("{} records done, {} imported, {} skipped, {:.1f} "
+                  "users/s".format(done, imported, skipped,
+                                   imported / elapsed), file=sys.stderr)
+    if path.exists(state_path):
+        remove(state_path)
+    print("imported {} users, skipped {}, in {:.1f}s".format(
+        imported, skipped, time.monotonic() - start))
+
+
+if __name__ == "__main__":
+    main()